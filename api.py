@@ -0,0 +1,292 @@
+import gzip
+import hashlib
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import dimensions
+import figure_cache
+import geometry
+import growth
+import query_layer
+import rankings
+import snapshots
+from ingest import DEFAULT_OUTPUT
+
+log = logging.getLogger(__name__)
+
+# 🔌 Read-only JSON API over the dashboard's data layer: the same snapshot, cube, result cache,
+# rankings and growth matrices as output/app.py, without a Streamlit rerun per request.
+# ETags are derived from the data version, so clients revalidate with If-None-Match and get 304s
+# until the next ingest; bodies over GZIP_MIN_BYTES are gzipped when the client accepts it.
+# /api/geometry serves the preprocessed boundaries (see geometry.py) with an ETag from the geometry
+# file instead, so a map client downloads them once and then re-fetches only the values.
+DEFAULT_PORT = 8600
+GZIP_MIN_BYTES = 1024
+ALL = "All"
+
+# Named endpoints for what the dashboard tabs show: path -> (table, group-by dims)
+VIEWS = {
+    "/api/states": ("map_hover_transactions", ["state"]),
+    "/api/insurance": ("insurance_data", ["state"]),
+    "/api/categories": ("transaction_categories", ["category"]),
+    "/api/brands": ("user_device_data", ["brand"]),
+    "/api/districts": ("map_transaction", ["district"]),
+}
+
+
+class BadRequest(ValueError):
+    status = 400
+
+
+class NotFound(ValueError):
+    status = 404
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _time_filters(params):
+    year = _one(params, "year", ALL)
+    quarter = _one(params, "quarter", ALL)
+    if year != ALL and not year.isdigit():
+        raise BadRequest(f"year must be a number or {ALL!r}, got {year!r}")
+    try:
+        q = query_layer.quarter_number(quarter)
+    except ValueError:
+        raise BadRequest(f"quarter must be Q1-Q4 or {ALL!r}, got {quarter!r}") from None
+    if q is not None and not 1 <= q <= 4:
+        raise BadRequest(f"quarter must be Q1-Q4 or {ALL!r}, got {quarter!r}")
+    return (year if year == ALL else str(int(year))), (ALL if q is None else f"Q{q}")
+
+
+def _state_filter(params, table):
+    state = _one(params, "state")
+    if state in (None, "", ALL):
+        return {}
+    if "state" not in query_layer.TABLES[table]["dims"]:
+        raise BadRequest(f"{table} cannot be filtered by state")
+    return {"state": dimensions.norm_state(state)}
+
+
+def _table(name, known):
+    if name not in known:
+        raise BadRequest(f"unknown table {name!r}; expected one of {sorted(known)}")
+    return name
+
+
+def frame_json(df):
+    """Compact ``{"columns": [...], "data": [[...], ...]}``; NaN becomes null."""
+    return df.to_json(orient="split", index=False, double_precision=6)
+
+
+class AggregateAPI:
+    """Routes one GET to ``(status, headers, body)``; shared by the threaded server and the WSGI app."""
+
+    def __init__(self, store, max_entries=figure_cache.DEFAULT_MAX_ENTRIES):
+        self.store = store
+        # Encoded bodies per (path, canonical query, gzip, version), in the figure cache's LRU
+        self._bodies = figure_cache.FigureCache(max_entries)
+
+    # ---------------------- Requests ----------------------
+    def parse(self, path, params):
+        """Validated, canonical query for ``path`` (the cache and ETag key), before any data is read."""
+        if path == "/api/version":
+            return ()
+        if path in VIEWS or path in ("/api/timeseries", "/api/aggregate"):
+            if path in VIEWS:
+                table, by = VIEWS[path]
+            else:
+                table = _table(_one(params, "table", ""), query_layer.TABLES)
+                by = ["year", "quarter"] if path == "/api/timeseries" else \
+                    [d for d in _one(params, "by", "").split(",") if d]
+                for dim in by:
+                    if dim not in query_layer.TIME_DIMS and dim not in query_layer.TABLES[table]["dims"]:
+                        raise BadRequest(f"{table} has no dimension {dim!r}")
+            year, quarter = _time_filters(params)
+            where = _state_filter(params, table)
+            if path == "/api/districts" and not where:
+                raise BadRequest("districts needs ?state=")
+            return (table, tuple(by), year, quarter, tuple(where.items()))
+        if path == "/api/top":
+            table = _table(_one(params, "table", "top_transaction"), rankings.RANK_TABLES)
+            level = _one(params, "level", "state")
+            if level not in rankings.LEVELS:
+                raise BadRequest(f"level must be one of {list(rankings.LEVELS)}")
+            metric = _one(params, "metric", rankings.RANK_TABLES[table][0])
+            if metric not in rankings.RANK_TABLES[table]:
+                raise BadRequest(f"{table} has no measure {metric!r}")
+            n = _one(params, "n", str(rankings.DEFAULT_K))
+            if not n.isdigit() or not 0 < int(n) <= 1000:
+                raise BadRequest("n must be between 1 and 1000")
+            state = _one(params, "state")
+            return (table, level, metric, int(n)) + _time_filters(params) + \
+                (dimensions.norm_state(state) if state not in (None, "", ALL) else None,)
+        if path == "/api/growth":
+            table = _table(_one(params, "table", ""), growth.GROWTH_DIMS)
+            measure = _one(params, "measure", query_layer.TABLES[table]["measures"][-1])
+            if measure not in query_layer.TABLES[table]["measures"]:
+                raise BadRequest(f"{table} has no measure {measure!r}")
+            return (table, measure) + _time_filters(params)
+        if path == "/api/geometry":
+            layer = _one(params, "layer", "state")
+            if layer not in geometry.LAYERS:
+                raise BadRequest(f"layer must be one of {list(geometry.LAYERS)}")
+            zoom = _one(params, "zoom", "medium")
+            if zoom not in geometry.ZOOMS:
+                raise BadRequest(f"zoom must be one of {list(geometry.ZOOMS)}")
+            state = _one(params, "state")
+            return layer, zoom, dimensions.norm_state(state) if state not in (None, "", ALL) else None
+        raise NotFound(f"no endpoint {path}")
+
+    def payload(self, snapshot, path, query):
+        """JSON body for a parsed query against one snapshot."""
+        if path == "/api/geometry":
+            geo = geometry.load_geojson(self.store.data_dir, *query)
+            if geo is None:
+                raise NotFound("no boundaries have been preprocessed; run geometry.py")
+            return json.dumps(geo, separators=(",", ":"))
+        if path == "/api/version":
+            tables = [t for t in query_layer.TABLES if snapshot.backend.available(t)]
+            return json.dumps({"version": snapshot.version, "backend": snapshot.backend.name, "tables": tables},
+                              separators=(",", ":"))
+        if path == "/api/top":
+            if snapshot.rankings is None:
+                raise NotFound("no top/ data has been ingested")
+            table, level, metric, n, year, quarter, state = query
+            result = snapshot.rankings.top(table, level, metric, n, year, quarter, state)
+        elif path == "/api/growth":
+            table, measure, year, quarter = query
+            matrix = snapshot.growth.matrix(table)
+            if matrix is None:
+                raise NotFound(f"{table} has not been ingested")
+            result = matrix.table(measure, year, quarter)
+        else:
+            table, by, year, quarter, where = query
+            if not snapshot.backend.available(table):
+                raise NotFound(f"{table} has not been ingested")
+            result = None
+            if snapshot.cube is not None and not where:
+                result = snapshot.cube.lookup(table, by, year, quarter)
+            if result is None:
+                result = snapshot.backend.aggregate(table, list(by), year, quarter,
+                                                    query_layer.with_basis(table, dict(where)))
+            if path == "/api/brands":
+                result = query_layer.with_share(result, "count")
+        return f'{{"version":{json.dumps(snapshot.version)},"result":{frame_json(result)}}}'
+
+    def handle(self, path, query_string="", headers=None):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        path = path.rstrip("/") or "/"
+        try:
+            query = self.parse(path, parse_qs(query_string or "", keep_blank_values=False))
+        except (BadRequest, NotFound) as exc:
+            return self._error(exc.status, str(exc))
+
+        snapshot = self.store.current()
+        version = snapshot.version
+        if path == "/api/geometry":
+            version = geometry.fingerprint(self.store.data_dir, *query[:2])
+            if version is None:
+                return self._error(404, "no boundaries have been preprocessed; run geometry.py")
+        digest = hashlib.sha1(json.dumps([path, query]).encode("utf-8")).hexdigest()[:16]
+        etag = f'"{version}-{digest}"'
+        common = [("ETag", etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if etag in [t.strip().removeprefix("W/") for t in headers.get("if-none-match", "").split(",")]:
+            return 304, common, b""
+
+        zipped = "gzip" in headers.get("accept-encoding", "")
+        try:
+            body, compressed = self._bodies.get_or_build((path, query, zipped, version),
+                                                         lambda: self._encode(snapshot, path, query, zipped))
+        except NotFound as exc:
+            return self._error(404, str(exc))
+        except Exception:
+            log.exception("pulse api %s %s failed", path, query)
+            return self._error(500, "internal error")
+        out = [("Content-Type", "application/json")] + common
+        if compressed:
+            out.append(("Content-Encoding", "gzip"))
+        return 200, out, body
+
+    def _encode(self, snapshot, path, query, zipped):
+        body = self.payload(snapshot, path, query).encode("utf-8")
+        if zipped and len(body) > GZIP_MIN_BYTES:
+            return gzip.compress(body, compresslevel=6), True
+        return body, False
+
+    @staticmethod
+    def _error(status, message):
+        body = json.dumps({"error": message}).encode("utf-8")
+        return status, [("Content-Type", "application/json")], body
+
+
+# ---------------------- Servers ----------------------
+def make_server(api, host="127.0.0.1", port=DEFAULT_PORT):
+    """A ThreadingHTTPServer (one thread per request) answering through ``api``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path, _, query_string = self.path.partition("?")
+            status, headers, body = api.handle(path, query_string, dict(self.headers.items()))
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            log.debug("%s " + fmt, self.address_string(), *args)
+
+    return ThreadingHTTPServer((host, int(port)), Handler)
+
+
+def make_wsgi_app(data_dir=DEFAULT_OUTPUT, backend_name=None):
+    """WSGI callable for threaded workers, e.g. ``gunicorn --threads 8 'api:make_wsgi_app()'``."""
+    api = AggregateAPI(snapshots.SnapshotStore(data_dir, backend_name))
+    reasons = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+    def application(environ, start_response):
+        if environ["REQUEST_METHOD"] != "GET":
+            status, headers, body = AggregateAPI._error(405, "read-only API: GET only")
+        else:
+            request_headers = {key[5:].replace("_", "-"): value for key, value in environ.items()
+                               if key.startswith("HTTP_")}
+            status, headers, body = api.handle(environ.get("PATH_INFO", "/"), environ.get("QUERY_STRING", ""),
+                                               request_headers)
+        start_response(f"{status} {reasons[status]}", headers + [("Content-Length", str(len(body)))])
+        return [body]
+
+    return application
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the dashboard's aggregates as a read-only JSON API.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--backend", help="mysql | duckdb | memory (default: PULSE_BACKEND or auto)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = make_server(AggregateAPI(snapshots.SnapshotStore(args.output, args.backend)), args.host, args.port)
+    print(f"🔌 Serving {args.output} at http://{args.host}:{args.port}/api/version")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
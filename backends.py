@@ -0,0 +1,302 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import dimensions
+import memory_store
+import query_layer
+import result_cache
+import storage
+from cube import CUBE_FILE
+from ingest import DATASETS, DEFAULT_OUTPUT
+from manifest import MANIFEST_FILE
+from mysql_loader import MYSQL_CONFIG, VERSION_TABLE
+
+# ⚙️ PULSE_BACKEND = auto | mysql | duckdb | memory
+#   auto -> embedded engine when `ingest.py --parquet` output exists (duckdb, else memory), else mysql
+BACKEND_ENV = "PULSE_BACKEND"
+
+
+def file_version(data_dir):
+    """Fingerprint of the ingested files (manifest, CSVs, cube) from their size and mtime."""
+    names = [MANIFEST_FILE, CUBE_FILE] + [file_name for file_name, _ in DATASETS.values()]
+    digest = hashlib.sha256()
+    for name in names:
+        try:
+            st = os.stat(os.path.join(data_dir, name))
+        except OSError:
+            continue
+        digest.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class Backend:
+    """Common query interface the dashboard tabs use, whatever stores the data."""
+
+    name = "base"
+    data_dir = DEFAULT_OUTPUT
+
+    def version(self):
+        """Cheap identifier of the data currently served; changes whenever an ingest lands."""
+        return file_version(self.data_dir)
+
+    def available(self, table):
+        """Whether ``table`` has been loaded; views over optional tables check this first."""
+        return True
+
+    def aggregate(self, table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLBackend(Backend):
+    """Runs :func:`query_layer.build_aggregate` statements; subclasses supply ``query``."""
+
+    def query(self, sql, params=()):
+        raise NotImplementedError
+
+    _dimensions_loaded = False
+
+    def aggregate(self, table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+        # Tables hold names as ingested: a canonical filter value matches all of its raw spellings
+        if where and not self._dimensions_loaded:
+            dimensions.load_dimension_tables(self.data_dir)
+            self._dimensions_loaded = True
+        where = dimensions.raw_filter(where)
+        sql, params = query_layer.build_aggregate(table, list(by), year, quarter, where, order_by, limit)
+        out = self.query(sql, params)
+        measures = query_layer.TABLES[table]["measures"]
+        for m in measures:
+            out[m] = pd.to_numeric(out[m], errors="coerce").fillna(0)
+            # SUM() of an integer column comes back as float/decimal from DuckDB and MySQL; only
+            # amount is fractional, so every backend serializes counts the same way
+            if m != "amount":
+                out[m] = out[m].round().astype(np.int64)
+        # Aggregates are small; canonical names are resolved per distinct value
+        return dimensions.canonicalize_frame(out, measures)
+
+
+class MySQLBackend(SQLBackend):
+    name = "mysql"
+
+    def __init__(self, **config):
+        self.config = dict(MYSQL_CONFIG, **config)
+
+    def version(self):
+        # mysql_loader.py stamps this row after every load
+        try:
+            out = self.query(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")
+        except Exception:
+            return "unversioned"
+        return str(out["version"].iloc[0]) if len(out) else "unversioned"
+
+    def query(self, sql, params=()):
+        import mysql.connector
+
+        conn = mysql.connector.connect(**self.config)
+        try:
+            return query_layer.fetch_mysql(conn, sql, params)
+        finally:
+            conn.close()
+
+
+class DuckDBBackend(SQLBackend):
+    """In-process DuckDB with one view per table over the ingested Parquet (or CSV) files."""
+
+    name = "duckdb"
+
+    def __init__(self, data_dir=DEFAULT_OUTPUT, database=":memory:"):
+        import duckdb
+
+        self.data_dir = data_dir
+        self._conn = duckdb.connect(database)
+        self._local = threading.local()
+        self._tables = [t for t in query_layer.TABLES if memory_store.available(data_dir, t)]
+        for table in self._tables:
+            self._conn.execute(f"CREATE OR REPLACE VIEW {table} AS {self._source(table)}")
+
+    def available(self, table):
+        return table in self._tables
+
+    def _source(self, table):
+        if storage.exists(self.data_dir, table):
+            pattern = os.path.join(storage.dataset_dir(self.data_dir, table), "**", "*.parquet")
+            return f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+        csv_path = os.path.join(self.data_dir, DATASETS[table][0])
+        # insurance_data.csv stores quarters as "Q2"; expose every table with an integer quarter
+        return ("SELECT * REPLACE (CAST(replace(CAST(quarter AS VARCHAR), 'Q', '') AS TINYINT) AS quarter) "
+                f"FROM read_csv_auto('{csv_path}', header = true)")
+
+    def _cursor(self):
+        # DuckDB connections are not shared across threads; each thread gets its own cursor
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._conn.cursor()
+        return cursor
+
+    def query(self, sql, params=()):
+        return self._cursor().execute(sql, list(params)).df()
+
+    def close(self):
+        self._conn.close()
+
+
+class MemoryBackend(Backend):
+    """Tables loaded once (on first use), typed, and split into (year, quarter) partitions.
+
+    Facts are stored compactly (see :func:`memory_store.compact_table`): dimension columns are
+    integer ``<dim>_id`` keys, and aggregates decode canonical names only for the result rows.
+    With pyarrow, each table is memory-mapped from a per-version Arrow snapshot, so every
+    session and worker process on the host shares one copy of the data.
+    """
+
+    name = "memory"
+
+    def __init__(self, data_dir=DEFAULT_OUTPUT):
+        self.data_dir = data_dir
+        self.snapshot_version = file_version(data_dir)
+        self.indexes = {}
+        self._load_lock = threading.Lock()
+
+    def index(self, table):
+        """Partition index for ``table``, loaded the first time a view asks for it."""
+        part_index = self.indexes.get(table)
+        if part_index is None:
+            with self._load_lock:
+                part_index = self.indexes.get(table)
+                if part_index is None:
+                    part_index = self.indexes[table] = memory_store.load_index(
+                        self.data_dir, table, self.snapshot_version)
+        return part_index
+
+    def available(self, table):
+        return table in self.indexes or memory_store.available(self.data_dir, table)
+
+    def loaded(self):
+        """Tables whose partition index has been loaded so far."""
+        with self._load_lock:
+            return list(self.indexes)
+
+    def updated(self, changes):
+        """Backend for the data now on disk, reusing what this one has loaded.
+
+        ``changes`` is ``{table: [[year, quarter], ...] or None}`` (None: the whole table) as
+        published by ``watch.py``. Unchanged tables are shared as-is; a changed table re-reads
+        only its touched partitions; tables never loaded here load lazily as usual.
+        """
+        new = MemoryBackend(self.data_dir)
+        with self._load_lock:
+            loaded = dict(self.indexes)
+        for table, part_index in loaded.items():
+            partitions = changes.get(table, [])
+            if partitions is None:
+                continue
+            new.indexes[table] = part_index if not partitions else memory_store.patch_index(
+                self.data_dir, table, part_index, partitions, new.snapshot_version)
+        return new
+
+    def memory_report(self):
+        return memory_store.memory_report(self.indexes)
+
+    def aggregate(self, table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+        measures = query_layer.TABLES[table]["measures"]
+        keys = [f"{dim}_id" if dim in dimensions.DIMENSIONS else query_layer.TABLES[table]["dims"].get(dim, dim)
+                for dim in by]
+        # A filter on the partition key (e.g. one state of a district table) reads only that key's rows
+        where = dict(where or {})
+        within = query_layer.TABLES[table].get("partition")
+        key = dimensions.DIMENSIONS[within].id_of(where.pop(within)) if within in where else None
+        # Sums are decomposable: aggregate each contiguous slice, then combine the small results
+        parts = [self._aggregate_slice(table, part, keys, where)
+                 for part in self.index(table).slices(year, quarter, key)]
+        out = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        if not by:
+            out = out[measures].sum().to_frame().T if len(parts) > 1 else out
+        else:
+            if len(parts) > 1:
+                out = out.groupby(keys, as_index=False, sort=False, observed=True)[measures].sum()
+            out = out.set_axis(list(by) + measures, axis=1)
+            for dim in by:
+                if dim in dimensions.DIMENSIONS:
+                    out[dim] = dimensions.DIMENSIONS[dim].decode(out[dim].to_numpy())
+        if order_by:
+            terms = list(query_layer.order_terms(order_by))
+            out = out.sort_values([col for col, _ in terms], ascending=[not desc for _, desc in terms])
+        return out.head(limit) if limit else out
+
+    @staticmethod
+    def _aggregate_slice(table, part, keys, where):
+        measures = query_layer.TABLES[table]["measures"]
+        if where:
+            mask = np.ones(len(part), dtype=bool)
+            for dim, value in where.items():
+                if dim in dimensions.DIMENSIONS:
+                    mask &= part[f"{dim}_id"].to_numpy() == dimensions.DIMENSIONS[dim].id_of(value)
+                else:
+                    mask &= (part[query_layer.TABLES[table]["dims"].get(dim, dim)] == value).to_numpy()
+            part = part[mask]
+        if not keys:
+            return part[measures].sum().to_frame().T
+        return part.groupby(keys, as_index=False, sort=False, observed=True)[measures].sum()
+
+
+class CachedBackend(Backend):
+    """Answers repeated aggregates of one data version from the on-disk result cache.
+
+    ``version`` is fixed for the wrapper's lifetime (a snapshot), so keys never mix versions.
+    """
+
+    def __init__(self, backend, version, cache):
+        self.backend = backend
+        self.name = backend.name
+        self.data_dir = getattr(backend, "data_dir", DEFAULT_OUTPUT)
+        self.cached_version = version
+        self.cache = cache
+
+    def __getattr__(self, attr):
+        # Backend-specific helpers (memory_report, index, query, ...) pass straight through
+        return getattr(self.backend, attr)
+
+    def version(self):
+        return self.backend.version()
+
+    def available(self, table):
+        return self.backend.available(table)
+
+    def aggregate(self, table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+        query = result_cache.normalize_query(table, by, year, quarter, where, order_by, limit)
+        return self.cache.get_or_compute(
+            self.cached_version, query,
+            lambda: self.backend.aggregate(table, by, year, quarter, where, order_by, limit))
+
+    def close(self):
+        self.backend.close()
+
+
+def _has_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def get_backend(name=None, data_dir=DEFAULT_OUTPUT):
+    name = (name or os.environ.get(BACKEND_ENV, "auto")).lower()
+    if name == "auto":
+        if storage.pa is None or not all(storage.exists(data_dir, t) for t in query_layer.TABLES):
+            name = "mysql"
+        else:
+            name = "duckdb" if _has_module("duckdb") else "memory"
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "duckdb":
+        return DuckDBBackend(data_dir)
+    if name == "memory":
+        return MemoryBackend(data_dir)
+    raise ValueError(f"unknown {BACKEND_ENV} {name!r} (expected auto, mysql, duckdb or memory)")
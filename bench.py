@@ -0,0 +1,217 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import backends
+import cube
+import synthetic
+from ingest import PROJECT_DIR, incremental_ingest
+
+# ⏱️ End-to-end benchmark on a synthetic tree: ingest, backend load, per-tab aggregate latency, memory.
+# Runs offline against the embedded backends; results are appended to RESULTS_FILE, one line per run.
+RESULTS_FILE = os.path.join(PROJECT_DIR, "bench_results.jsonl")
+SCALES = {
+    "small": {"years": 3, "states": 12, "districts": 5, "pincodes": 3},
+    "medium": {"years": 6, "states": 36, "districts": 20, "pincodes": 10},
+    "large": {"years": 10, "states": 36, "districts": 60, "pincodes": 30},
+}
+# The aggregates each dashboard tab asks for (see output/app.py); the summary tab ignores the filters
+TAB_QUERIES = {
+    "insurance": [("insurance_data", ("state",))],
+    "state_map": [("map_hover_transactions", ("state",))],
+    "categories": [("transaction_categories", ("category",))],
+    "devices": [("user_device_data", ("brand",))],
+    "summary": [("insurance_data", ()), ("map_hover_transactions", ()),
+                ("insurance_data", ("year", "quarter")), ("map_hover_transactions", ("year", "quarter"))],
+}
+
+
+def _proc_status_mb(field):
+    """VmHWM/VmRSS of this process in MB from /proc (Linux), or None."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # VmHWM first: a spawned process's ru_maxrss starts at its parent's peak (Linux carries it across exec)
+    if who == resource.RUSAGE_SELF:
+        peak = _proc_status_mb("VmHWM")
+        if peak is not None:
+            return peak
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentiles(samples_ms):
+    values = np.asarray(samples_ms)
+    return {"p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3), "n": len(values)}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def filter_combinations(years):
+    return [(y, q) for y in ["All"] + [str(y) for y in years] for q in ["All", "Q1", "Q2", "Q3", "Q4"]]
+
+
+def bench_ingest(root, output_dir, workers):
+    summary, seconds = timed(incremental_ingest, root, output_dir, workers=workers, full=True, parquet=True)
+    rows = sum(info["rows"] for info in summary.values())
+    files = sum(info["parsed"] for info in summary.values())
+    _, noop_seconds = timed(incremental_ingest, root, output_dir, workers=workers, parquet=True)
+    return {"seconds": round(seconds, 3), "files": files, "rows": rows,
+            "files_per_s": round(files / seconds, 1), "rows_per_s": round(rows / seconds, 1),
+            "noop_seconds": round(noop_seconds, 3), "peak_rss_children_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+
+def bench_backend(name, output_dir, combinations, repeat):
+    start_rss = _proc_status_mb("VmRSS")
+    backend, construct = timed(backends.get_backend, name, output_dir)
+    # Load = construction plus the first query on every table (memory loads lazily)
+    _, first = timed(lambda: [backend.aggregate(t) for t in {t for qs in TAB_QUERIES.values() for t, _ in qs}])
+    tabs = {}
+    for tab, queries in TAB_QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            for year, quarter in combinations:
+                start = time.perf_counter()
+                for table, by in queries:
+                    backend.aggregate(table, list(by), year, quarter)
+                samples.append((time.perf_counter() - start) * 1000)
+        tabs[tab] = percentiles(samples)
+    backend.close()
+    peak = peak_rss_mb()
+    return {"load_seconds": round(construct + first, 3), "tabs": tabs, "peak_rss_mb": peak,
+            "rss_delta_mb": None if start_rss is None else round(peak - start_rss, 1)}
+
+
+def isolated(fn, *args):
+    """Run ``fn(*args)`` in a fresh spawned process, so its peak RSS is its own and not the sum of earlier runs."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def bench_cube(output_dir, combinations, repeat):
+    agg_cube, load = timed(cube.load_cube, output_dir)
+    samples = []
+    for _ in range(repeat):
+        for year, quarter in combinations:
+            start = time.perf_counter()
+            for queries in TAB_QUERIES.values():
+                for table, by in queries:
+                    agg_cube.lookup(table, by, year, quarter)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {"load_seconds": round(load, 3), "all_tabs": percentiles(samples)}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def flatten(metrics, prefix=""):
+    out = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            out.update(flatten(value, f"{prefix}{key}."))
+        elif key != "n" and isinstance(value, (int, float)):
+            out[f"{prefix}{key}"] = value
+    return out
+
+
+def previous_result(path, scale, commit):
+    """Most recent stored run at the same scale from another commit."""
+    if not os.path.exists(path):
+        return None
+    found = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["scale"] == scale and record["commit"] != commit:
+                found = record
+    return found
+
+
+def print_comparison(record, previous):
+    now, before = flatten(record["metrics"]), flatten(previous["metrics"])
+    print(f"\n{'metric':<45}{previous['commit']:>14}{record['commit']:>14}{'change':>10}")
+    for key, value in now.items():
+        old = before.get(key)
+        change = f"{(value - old) / old * 100:+.1f}%" if old else ""
+        print(f"{key:<45}{'' if old is None else old:>14}{value:>14}{change:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and dashboard queries on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for dim in ("years", "states", "districts", "pincodes"):
+        parser.add_argument(f"--{dim}", type=int, help=f"override the preset's {dim}")
+    parser.add_argument("--backend", action="append", choices=["memory", "duckdb"],
+                        help="embedded backend to time (repeatable; default: memory, plus duckdb if installed)")
+    parser.add_argument("--workers", type=int, default=None, help="ingest process pool size")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over every filter combination")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON-lines file runs are appended to")
+    parser.add_argument("--keep", help="generate into this directory and keep it")
+    args = parser.parse_args(argv)
+
+    scale = dict(SCALES[args.scale])
+    scale.update({k: getattr(args, k) for k in scale if getattr(args, k) is not None})
+    names = args.backend or ["memory"] + (["duckdb"] if backends._has_module("duckdb") else [])
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="pulse-bench-")
+    root, output_dir = os.path.join(work_dir, "data"), os.path.join(work_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        (files, size), gen_seconds = timed(synthetic.generate, root, **scale)
+        print(f"🧪 Generated {files} files ({size / 1e6:.1f} MB) in {gen_seconds:.1f}s: {scale}")
+        metrics = {"ingest": bench_ingest(root, output_dir, args.workers)}
+        combinations = filter_combinations(synthetic.Generator(root, **scale).years)
+        metrics["cube"] = bench_cube(output_dir, combinations, args.repeat)
+        for name in names:
+            metrics[name] = isolated(bench_backend, name, output_dir, combinations, args.repeat)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    commit, dirty = git_commit()
+    record = {"commit": commit, "dirty": dirty, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "scale": scale, "source_files": files, "source_bytes": size, "metrics": metrics}
+    previous = previous_result(args.results, scale, commit)
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    print(json.dumps(metrics, indent=2))
+    if previous:
+        print_comparison(record, previous)
+    print(f"✅ Appended results for {commit}{' (dirty)' if dirty else ''} to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
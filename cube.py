@@ -0,0 +1,223 @@
+import csv
+import json
+import os
+from collections import defaultdict
+
+import pandas as pd
+
+import dimensions
+import query_layer
+
+# 🧊 Precomputed sums per (table, dimension, year, quarter, key), including "All" rollups
+CUBE_FILE = "aggregate_cube.csv"
+CUBE_HEADERS = ["table", "dim", "year", "quarter", "key", "count", "amount"]
+ALL = "All"
+# What the cells mean: bump FORMAT_VERSION when that changes. The stamp (with the rows each table
+# is summed over, query_layer.BASIS) is written next to the cube; a cube whose stamp differs, or
+# that has none, was built under other rules and is rebuilt rather than served.
+FORMAT_FILE = "aggregate_cube.format.json"
+FORMAT_VERSION = 2
+
+# Dimension each tab groups by; "" is the grand total (and, per year/quarter, the time series)
+CUBE_DIMS = {
+    "insurance_data": ["state"],
+    "map_hover_transactions": ["state"],
+    "transaction_categories": ["category"],
+    "user_device_data": ["brand"],
+}
+
+
+def partition_cells(rows_by_table):
+    """``{table: csv rows}`` -> ``{(table, dim, year, quarter, key): [count, amount]}`` for each
+    row's own (year, quarter), with the per-period rollups over each dimension's members."""
+    sums = defaultdict(lambda: [0, 0.0])
+
+    def canonical(dim, raw):
+        dimension = dimensions.DIMENSIONS.get(dim)
+        return dimension.names[dimension.id_of(raw)] if dimension else raw
+
+    for table, rows in rows_by_table.items():
+        if table not in CUBE_DIMS:
+            continue  # district tables are queried per state, not rolled up
+        columns = {dim: query_layer.TABLES[table]["dims"][dim] for dim in CUBE_DIMS[table]}
+        has_amount = "amount" in query_layer.TABLES[table]["measures"]
+        basis = [(query_layer.TABLES[table]["dims"][dim], value)
+                 for dim, value in query_layer.BASIS.get(table, {}).items()]
+        for row in rows:
+            if any(row[col] != value for col, value in basis):
+                continue
+            count = int(float(row.get("count") or 0))
+            amount = float(row.get("amount") or 0) if has_amount else 0.0
+            year = str(int(float(row["year"])))
+            quarter = str(query_layer.quarter_number(row["quarter"]))
+            keys = [("", ALL)] + [(dim, canonical(dim, row[col])) for dim, col in columns.items()]
+            for dim, key in keys:
+                for k in ((key, ALL) if dim else (key,)):
+                    cell = sums[(table, dim, year, quarter, k)]
+                    cell[0] += count
+                    cell[1] += amount
+    return sums
+
+
+def with_rollups(cells):
+    """Per-period cells plus their "All" year / quarter rollups, summed in key order so a full build
+    and a partition update (:func:`update_cube`) produce identical cells."""
+    out = {}
+    for key in sorted(cells):
+        table, dim, year, quarter, k = key
+        out[key] = list(cells[key])
+        for rollup in ((table, dim, year, ALL, k), (table, dim, ALL, quarter, k), (table, dim, ALL, ALL, k)):
+            cell = out.setdefault(rollup, [0, 0.0])
+            cell[0] += cells[key][0]
+            cell[1] += cells[key][1]
+    return out
+
+
+def build_cube(rows_by_table):
+    """``{table: csv rows}`` -> cube rows covering every year x quarter x key combination."""
+    cells = with_rollups(partition_cells(rows_by_table))
+    return [dict(zip(CUBE_HEADERS, key + tuple(value))) for key, value in sorted(cells.items())]
+
+
+def cube_format():
+    return {"version": FORMAT_VERSION, "basis": query_layer.BASIS}
+
+
+def is_current(output_dir):
+    """Whether ``output_dir`` has a cube built under the current :func:`cube_format`."""
+    if not os.path.exists(os.path.join(output_dir, CUBE_FILE)):
+        return False
+    try:
+        with open(os.path.join(output_dir, FORMAT_FILE), encoding="utf-8") as f:
+            return json.load(f) == cube_format()
+    except (OSError, ValueError):
+        return False
+
+
+def _replace(path, write):
+    # Per-process temporary name: several server processes may rebuild a stale cube at once
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _write(output_dir, rows):
+    path = os.path.join(output_dir, CUBE_FILE)
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=CUBE_HEADERS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    # The stamp goes last: a crash in between leaves a cube that is rebuilt, never a stale one trusted
+    _replace(path, write)
+    _replace(os.path.join(output_dir, FORMAT_FILE), lambda f: json.dump(cube_format(), f, sort_keys=True))
+    return path, len(rows)
+
+
+def write_cube(output_dir, rows_by_table):
+    return _write(output_dir, build_cube(rows_by_table))
+
+
+def update_cube(output_dir, rows_by_table, partitions):
+    """Merge changed data into the existing cube without reading the other partitions' rows.
+
+    ``rows_by_table`` holds each changed table's current rows for its touched (year, quarter)
+    ``partitions`` (None: the table was rebuilt and these are all its rows). Those period cells
+    are replaced and the table's rollups are re-summed from its period cells.
+    """
+    changed = {table for table in rows_by_table if table in CUBE_DIMS}
+    if not changed:
+        return os.path.join(output_dir, CUBE_FILE), None
+    cells = {}
+    with open(os.path.join(output_dir, CUBE_FILE), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = tuple(row[h] for h in CUBE_HEADERS[:5])
+            if row["table"] in changed:
+                if ALL in (row["year"], row["quarter"]):
+                    continue  # re-summed below
+                touched = partitions.get(row["table"])
+                if touched is None or (int(row["year"]), int(row["quarter"])) in touched:
+                    continue
+            cells[key] = [int(row["count"]), float(row["amount"])]
+    cells.update(partition_cells({table: rows_by_table[table] for table in changed}))
+    kept = {key: value for key, value in cells.items() if key[0] not in changed}
+    periods = {key: value for key, value in cells.items() if key[0] in changed}
+    kept.update(with_rollups(periods))
+    return _write(output_dir, [dict(zip(CUBE_HEADERS, key + tuple(value))) for key, value in sorted(kept.items())])
+
+
+class Cube:
+    """Direct key lookup over the precomputed cube: one dict access per tab query."""
+
+    def __init__(self, frame):
+        self._slices = {}
+        for (table, dim, year, quarter), part in frame.groupby(["table", "dim", "year", "quarter"], sort=False):
+            measures = query_layer.TABLES[table]["measures"]
+            if dim:
+                # "All" rows are rollups over the dimension; the tabs want the members
+                part = part[part["key"] != ALL]
+                out = part[["key"] + measures].rename(columns={"key": dim})
+            else:
+                out = part[measures]
+            self._slices[(table, dim, year, quarter)] = out.reset_index(drop=True)
+        # (year, quarter) series per table, from the per-period grand totals
+        for table in CUBE_DIMS:
+            periods = frame[(frame["table"] == table) & (frame["dim"] == "")
+                            & (frame["year"] != ALL) & (frame["quarter"] != ALL)]
+            series = periods.assign(year=periods["year"].astype(int), quarter=periods["quarter"].astype(int))
+            measures = query_layer.TABLES[table]["measures"]
+            self._slices[(table, "year,quarter", ALL, ALL)] = (
+                series[["year", "quarter"] + measures].sort_values(["year", "quarter"]).reset_index(drop=True)
+            )
+
+    def lookup(self, table, by=(), year=ALL, quarter=ALL):
+        """Cached slice for this query, or None when the cube does not cover it."""
+        dim = ",".join(by)
+        q = query_layer.quarter_number(quarter)
+        key = (table, dim, ALL if year == ALL else str(int(year)), ALL if q is None else str(q))
+        return self._slices.get(key)
+
+
+def rebuild_cube(output_dir):
+    """Rebuild the cube from every ingested CSV; returns ``(path, rows_by_table)``."""
+    from ingest import DATASETS, read_csv
+
+    present = [d for d in DATASETS if os.path.exists(os.path.join(output_dir, DATASETS[d][0]))]
+    rows_by_table = {d: read_csv(output_dir, d) for d in present}
+    path, _ = write_cube(output_dir, rows_by_table)
+    return path, rows_by_table
+
+
+def load_cube(output_dir):
+    """Cube from ``output_dir``, or None if ingestion has not built one. A cube from an older
+    :data:`FORMAT_VERSION` or basis is rebuilt from the CSVs first."""
+    path = os.path.join(output_dir, CUBE_FILE)
+    if not os.path.exists(path):
+        return None
+    if not is_current(output_dir):
+        rebuild_cube(output_dir)
+    frame = pd.read_csv(path, dtype={"dim": str, "year": str, "quarter": str, "key": str},
+                        keep_default_na=False)
+    frame["count"] = frame["count"].astype("int64")
+    frame["amount"] = frame["amount"].astype("float64")
+    return Cube(frame)
+
+
+def main(argv=None):
+    import argparse
+
+    from ingest import DEFAULT_OUTPUT
+
+    parser = argparse.ArgumentParser(description="Rebuild aggregate_cube.csv from the ingested CSVs.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested CSVs")
+    args = parser.parse_args(argv)
+
+    path, rows_by_table = rebuild_cube(args.output)
+    dimensions.write_dimension_tables(args.output, rows_by_table)
+    print(f"✅ Saved the cube to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import query_layer
+
+# 🗺️ Dimension tables: raw names -> integer IDs, canonical display names and attributes.
+# Normalization runs once per distinct raw value, never per row or per rerun.
+
+STATE_FIX = {
+    "andaman & nicobar islands": "Andaman and Nicobar Islands",
+    "andaman and nicobar isl": "Andaman and Nicobar Islands",
+    "delhi": "NCT of Delhi",
+    "nct of delhi": "NCT of Delhi",
+    "jammu & kashmir": "Jammu and Kashmir",
+    "dadra & nagar haveli and daman & diu": "Dadra and Nagar Haveli and Daman and Diu",
+    "dadra and nagar haveli": "Dadra and Nagar Haveli and Daman and Diu",
+    "daman and diu": "Dadra and Nagar Haveli and Daman and Diu",
+    "arunanchal pradesh": "Arunachal Pradesh",
+    "telengana": "Telangana",
+    "odisha": "Odisha",
+}
+
+
+def _state_key(s: str) -> str:
+    # "andaman-&-nicobar-islands" (folder names) and "Andaman & Nicobar Islands" share one key
+    return " ".join(s.strip().lower().replace("-", " ").replace("&", "and").split())
+
+
+STATE_FIX = {_state_key(raw): display for raw, display in STATE_FIX.items()}
+
+
+def norm_state(s: str) -> str:
+    if not isinstance(s, str):
+        return ""
+    key = _state_key(s)
+    return STATE_FIX.get(key, key.title().replace(" And ", " and "))
+
+
+def norm_district(s: str) -> str:
+    if not isinstance(s, str):
+        return ""
+    name = " ".join(s.replace("-", " ").split()).title()
+    return name[:-len(" District")] if name.endswith(" District") else name
+
+
+def norm_brand(s: str) -> str:
+    if not isinstance(s, str) or not s.strip():
+        return "Unknown"
+    return " ".join(s.split())
+
+
+# ---------------------- India state centroids ----------------------
+STATE_CENTROIDS = {
+    "Andhra Pradesh": (15.9129, 79.7400),
+    "Arunachal Pradesh": (28.2180, 94.7278),
+    "Assam": (26.2006, 92.9376),
+    "Bihar": (25.0961, 85.3131),
+    "Chhattisgarh": (21.2787, 81.8661),
+    "Goa": (15.2993, 74.1240),
+    "Gujarat": (22.2587, 71.1924),
+    "Haryana": (29.0588, 76.0856),
+    "Himachal Pradesh": (31.1048, 77.1734),
+    "Jharkhand": (23.6102, 85.2799),
+    "Karnataka": (15.3173, 75.7139),
+    "Kerala": (10.8505, 76.2711),
+    "Madhya Pradesh": (22.9734, 78.6569),
+    "Maharashtra": (19.7515, 75.7139),
+    "Manipur": (24.6637, 93.9063),
+    "Meghalaya": (25.4670, 91.3662),
+    "Mizoram": (23.1645, 92.9376),
+    "Nagaland": (26.1584, 94.5624),
+    "Odisha": (20.9517, 85.0985),
+    "Punjab": (31.1471, 75.3412),
+    "Rajasthan": (27.0238, 74.2179),
+    "Sikkim": (27.5330, 88.5122),
+    "Tamil Nadu": (11.1271, 78.6569),
+    "Telangana": (18.1124, 79.0193),
+    "Tripura": (23.9408, 91.9882),
+    "Uttar Pradesh": (27.5706, 80.0982),
+    "Uttarakhand": (30.0668, 79.0193),
+    "West Bengal": (22.9868, 87.8550),
+    "Andaman and Nicobar Islands": (11.7401, 92.6586),
+    "Chandigarh": (30.7333, 76.7794),
+    "Dadra and Nagar Haveli and Daman and Diu": (20.3000, 73.0000),
+    "NCT of Delhi": (28.7041, 77.1025),
+    "Jammu and Kashmir": (33.7782, 76.5762),
+    "Ladakh": (34.1526, 77.5770),
+    "Lakshadweep": (10.5667, 72.6417),
+    "Puducherry": (11.9416, 79.8083),
+}
+
+
+class Dimension:
+    """Append-only dimension: integer ID per canonical name, raw-name lookups memoized.
+
+    IDs are positions in ``names``; seeding with a fixed list keeps them stable across processes.
+    """
+
+    def __init__(self, name, normalize, seed=()):
+        self.name = name
+        self.normalize = normalize
+        self.names = []
+        self._ids = {}
+        self._raw_ids = {}
+        self._lock = threading.Lock()
+        for display in seed:
+            self._add(display)
+
+    def _add(self, display):
+        if display not in self._ids:
+            self._ids[display] = len(self.names)
+            self.names.append(display)
+        return self._ids[display]
+
+    def id_of(self, raw):
+        dim_id = self._raw_ids.get(raw)
+        if dim_id is None:
+            with self._lock:
+                dim_id = self._raw_ids[raw] = self._add(self.normalize(raw))
+        return dim_id
+
+    def encode(self, values) -> np.ndarray:
+        """Vectorized: normalize the distinct values, then broadcast IDs back by position."""
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+        ids = np.array([self.id_of(u) for u in uniques] + [-1], dtype=np.int32)
+        return ids[codes]
+
+    def adopt(self, names) -> np.ndarray:
+        """Local IDs for an ID-ordered ``names`` list written by another process.
+
+        Identity whenever both processes saw the names in the same order; the trailing -1
+        keeps encode()'s missing-value sentinel intact when remapping.
+        """
+        with self._lock:
+            return np.array([self._add(n) for n in names] + [-1], dtype=np.int32)
+
+    def raw_names(self, value) -> list:
+        """Every raw spelling seen so far of ``value``'s canonical name (the canonical name included)."""
+        dim_id = self.id_of(value)
+        with self._lock:
+            raws = {raw for raw, i in self._raw_ids.items() if i == dim_id}
+        return sorted(raws | {self.names[dim_id]}, key=str)
+
+    def decode(self, ids) -> np.ndarray:
+        names = np.array(self.names + [""], dtype=object)
+        return names[np.asarray(ids)]
+
+    def canonical(self, values) -> np.ndarray:
+        return self.decode(self.encode(values))
+
+    def raw_table(self) -> pd.DataFrame:
+        """raw_name -> id -> display name, as seen so far."""
+        rows = sorted(self._raw_ids.items(), key=lambda kv: (kv[1], str(kv[0])))
+        return pd.DataFrame({"raw_name": [r for r, _ in rows], f"{self.name}_id": [i for _, i in rows],
+                             self.name: [self.names[i] for _, i in rows]})
+
+
+STATES = Dimension("state", norm_state, seed=STATE_CENTROIDS)
+DISTRICTS = Dimension("district", norm_district)
+BRANDS = Dimension("brand", norm_brand)
+DIMENSIONS = {"state": STATES, "district": DISTRICTS, "brand": BRANDS}
+
+STATE_FRAME = pd.DataFrame({
+    "state_id": np.arange(len(STATE_CENTROIDS), dtype=np.int32),
+    "state": list(STATE_CENTROIDS),
+    "lat": [lat for lat, _ in STATE_CENTROIDS.values()],
+    "lon": [lon for _, lon in STATE_CENTROIDS.values()],
+})
+
+
+def canonicalize_frame(df: pd.DataFrame, measures) -> pd.DataFrame:
+    """Canonical names for every dimension column of an aggregate, merging raw spellings."""
+    dims = [col for col in df.columns if col in DIMENSIONS]
+    if not dims:
+        return df
+    out = df.assign(**{col: DIMENSIONS[col].canonical(df[col]) for col in dims})
+    keys = [col for col in out.columns if col not in measures]
+    return out.groupby(keys, as_index=False, sort=False)[list(measures)].sum()
+
+
+def raw_filter(where):
+    """``{dim: canonical value}`` -> ``{dim: (raw spellings...)}`` for the dimensions with tables.
+
+    SQL backends store the names as ingested, so a filter on a canonical name must match every
+    spelling of it; call :func:`load_dimension_tables` first so spellings from the files are known.
+    """
+    return {dim: tuple(DIMENSIONS[dim].raw_names(value)) if dim in DIMENSIONS else value
+            for dim, value in (where or {}).items()} or None
+
+
+def load_dimension_tables(output_dir):
+    """Register the raw spellings in existing dim_<name>.csv files, in ID order."""
+    for dim, dimension in DIMENSIONS.items():
+        path = os.path.join(output_dir, f"dim_{dim}.csv")
+        if os.path.exists(path):
+            existing = pd.read_csv(path, usecols=["raw_name", f"{dim}_id"], dtype={"raw_name": str},
+                                   keep_default_na=False)
+            for raw in existing.sort_values(f"{dim}_id", kind="stable")["raw_name"]:
+                dimension.id_of(raw)
+
+
+def write_dimension_tables(output_dir, rows_by_table, merge=False):
+    """dim_<name>.csv with every raw spelling seen in the ingested CSV rows.
+
+    With ``merge``, the spellings already in the existing files are kept, so an incremental ingest
+    only passes the rows of the partitions it touched.
+    """
+    if merge:
+        load_dimension_tables(output_dir)
+    for table, rows in rows_by_table.items():
+        if table not in query_layer.TABLES:
+            continue
+        for dim, col in query_layer.TABLES[table]["dims"].items():
+            if dim in DIMENSIONS:
+                for row in rows:
+                    DIMENSIONS[dim].id_of(row[col])
+    paths = []
+    for dim, dimension in DIMENSIONS.items():
+        table = dimension.raw_table()
+        if table.empty:
+            continue
+        if dim == "state":
+            table = table.merge(STATE_FRAME[["state", "lat", "lon"]], on="state", how="left")
+        path = os.path.join(output_dir, f"dim_{dim}.csv")
+        table.to_csv(path, index=False)
+        paths.append(path)
+    return paths
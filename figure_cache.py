@@ -0,0 +1,61 @@
+import json
+import threading
+from collections import OrderedDict
+
+# 📈 Built Plotly figures keyed by (figure id, year, quarter, view option, data version)
+DEFAULT_MAX_ENTRIES = 256
+
+
+class FigureCache:
+    """Bounded, thread-safe LRU of built figures shared by every session in a process.
+
+    Cached figures are treated as immutable: builders must finish all ``update_*`` calls
+    before returning, and callers must not modify what they get back. With a ``store``
+    (:class:`result_cache.ResultCache`), misses fall back to figures persisted on disk by this
+    or another process (e.g. ``warmup.py``) before building; the key's last item is the version.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            fig = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+        # Built outside the lock so one slow figure does not block other sessions
+        if self.store is None:
+            fig = build()
+        else:
+            fig = self.store.get_or_compute(str(key[-1]), _store_key(key), build)
+        self.put(key, fig)
+        return fig
+
+    def put(self, key, fig):
+        with self._lock:
+            self._entries[key] = fig
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "max_entries": self.max_entries, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+def _store_key(key):
+    return json.dumps(["figure"] + [str(part) for part in key[:-1]])
@@ -0,0 +1,355 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import dimensions
+import query_layer
+from ingest import DEFAULT_OUTPUT
+
+# 🗺️ Boundary geometry for the choropleth maps. India state/district GeoJSON is preprocessed once:
+# rings are snapped to an integer grid, simplified (Douglas-Peucker) at a few zoom tolerances one
+# shared border at a time, delta-encoded and stored as compressed arrays keyed by canonical region ID.
+# The dashboard and the API decode a zoom level once per process and reuse it for every request.
+GEOMETRY_DIR = "geometry"
+LAYERS = ("state", "district")
+# Simplification tolerance in degrees (~5.5 km, ~1.1 km, ~220 m at India's latitudes)
+ZOOMS = {"low": 0.05, "medium": 0.01, "high": 0.002}
+QUANTIZATION = 1 << 16  # grid steps across the layer's bounding box
+DECIMALS = 4  # decoded coordinates; finer than one grid step over India
+# Property names used by the common India boundary files, tried in order
+NAME_PROPERTIES = {
+    "state": ("ST_NM", "st_nm", "NAME_1", "state", "State", "state_name", "name"),
+    "district": ("DISTRICT", "district", "dtname", "NAME_2", "district_name", "name"),
+}
+STATE_PROPERTIES = ("ST_NM", "st_nm", "NAME_1", "state", "State", "state_name", "statename")
+
+
+def region_id(state, district=None):
+    """Canonical key of a boundary: the state name, or ``"<state>|<district>"`` for districts."""
+    state = dimensions.norm_state(state)
+    return state if district is None else f"{state}|{dimensions.norm_district(district)}"
+
+
+def geometry_path(data_dir, layer, zoom):
+    return os.path.join(data_dir, GEOMETRY_DIR, f"{layer}_{zoom}.npz")
+
+
+def available(data_dir, layer, zoom="medium"):
+    return os.path.exists(geometry_path(data_dir, layer, zoom))
+
+
+# ---------------------- Simplification ----------------------
+def simplify(points, tolerance):
+    """Douglas-Peucker: positions of the ``points`` (N x 2) to keep so no dropped point lies
+    farther than ``tolerance`` from the simplified line. Both ends are always kept."""
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(ab[0], ab[1])
+        if length == 0:  # closed ring: distance to the shared end point
+            dist = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            dist = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def _signed_area(ring):
+    """Shoelace area of an open ring; positive when counter-clockwise."""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def _open_ring(coords):
+    """A GeoJSON ring as an N x 2 array without the repeated closing point."""
+    ring = np.asarray(coords, dtype=np.float64)[:, :2]
+    return ring[:-1] if len(ring) > 1 and (ring[0] == ring[-1]).all() else ring
+
+
+def _grid_ring(ring, origin, step, outer=True):
+    """A ring on the integer grid with repeated points removed, or None when it collapses.
+
+    Outer rings are wound clockwise and holes counter-clockwise, as d3-geo (Plotly's geo maps) expects.
+    """
+    if (_signed_area(ring) > 0) == outer:
+        ring = ring[::-1]
+    grid = np.round((ring - origin) / step).astype(np.int64)
+    moved = np.ones(len(grid), dtype=bool)
+    moved[1:] = (np.diff(grid, axis=0) != 0).any(axis=1)
+    if len(grid) > 1 and (grid[0] == grid[-1]).all():
+        moved[-1] = False
+    grid = grid[moved]
+    return grid if len(grid) >= 3 else None
+
+
+def junctions(rings):
+    """Per ring, a mask of the vertices where a border shared with other rings starts or ends.
+
+    Each grid point gets a signature of the set of rings passing through it; a vertex is a junction
+    wherever that set changes along a ring, in any ring. Cutting every ring at its junctions yields
+    arcs that are either private to one ring or traversed identically (perhaps reversed) by all of them.
+    """
+    sizes = [len(r) for r in rings]
+    points = np.vstack(rings)
+    ring_of = np.repeat(np.arange(len(rings)), sizes)
+    pid = np.unique(points[:, 0] * QUANTIZATION + points[:, 1], return_inverse=True)[1].ravel()
+    pairs = np.unique(np.column_stack([pid, ring_of]), axis=0)
+    weights = np.random.default_rng(0).integers(1, 1 << 62, len(rings), dtype=np.uint64)
+    signature = np.zeros(pid.max() + 1, dtype=np.uint64)
+    np.add.at(signature, pairs[:, 0], weights[pairs[:, 1]])
+    sig = signature[pid]
+    changed = np.zeros(len(points), dtype=bool)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        ring = sig[start:end]
+        changed[start:end] = (ring != np.roll(ring, 1)) | (ring != np.roll(ring, -1))
+    fixed = np.bincount(pid, weights=changed, minlength=len(signature)) > 0
+    return [fixed[pid[start:end]] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _simplified_arc(arc, tolerance, step, done):
+    """``arc`` simplified in its canonical direction, so every ring sharing it keeps the same points."""
+    first, last = tuple(arc[0]), tuple(arc[-1])
+    flip = last < first or (last == first and tuple(arc[-2]) < tuple(arc[1]))
+    canonical = arc[::-1] if flip else arc
+    key = canonical.tobytes()
+    if key not in done:
+        done[key] = canonical[simplify(canonical * step, tolerance)]
+    return done[key][::-1] if flip else done[key]
+
+
+def _simplified_ring(grid, fixed, tolerance, step, done):
+    """Douglas-Peucker over each arc between junctions; None when fewer than three points remain."""
+    cuts = np.flatnonzero(fixed)
+    if not len(cuts):  # nothing shared: start at the smallest point so identical rings agree
+        cuts = [int(np.lexsort((grid[:, 1], grid[:, 0]))[0])]
+    ring = np.roll(grid, -cuts[0], axis=0)
+    closed = np.vstack([ring, ring[:1]])
+    bounds = list(np.asarray(cuts) - cuts[0]) + [len(ring)]
+    kept = [_simplified_arc(closed[a:b + 1], tolerance, step, done)[:-1] for a, b in zip(bounds[:-1], bounds[1:])]
+    out = np.vstack(kept)
+    return out if len(out) >= 3 else None
+
+
+# ---------------------- Encoding ----------------------
+def encode_layer(regions, tolerance):
+    """Compact arrays for ``{region_id: [polygon, ...]}`` (polygons as lists of open N x 2 rings).
+
+    Rings are snapped to a shared integer grid, cut at their :func:`junctions` and simplified arc by
+    arc, so neighbouring regions keep one common border at every zoom (no gaps or slivers). They are
+    stored delta-encoded; ``*_offsets`` index features -> polygons -> rings -> points. Holes and islands
+    that collapse at ``tolerance`` are dropped, but every region keeps at least its largest polygon.
+    """
+    every = np.vstack([ring for polygons in regions.values() for polygon in polygons for ring in polygon])
+    origin = every.min(axis=0)
+    step = np.maximum(every.max(axis=0) - origin, 1e-9) / (QUANTIZATION - 1)
+    gridded = {rid: [[_grid_ring(ring, origin, step, outer=k == 0) for k, ring in enumerate(polygon)]
+                     for polygon in polygons] for rid, polygons in regions.items()}
+    rings = [ring for polygons in gridded.values() for polygon in polygons for ring in polygon if ring is not None]
+    fixed = iter(junctions(rings))
+    done = {}
+    ids, feature_offsets, polygon_offsets, ring_offsets, chunks = [], [0], [0], [0], []
+    for rid, polygons in gridded.items():
+        kept = []
+        for polygon in polygons:
+            simplified = [None if ring is None else _simplified_ring(ring, next(fixed), tolerance, step, done)
+                          for ring in polygon]
+            if simplified[0] is not None:
+                kept.append([simplified[0]] + [h for h in simplified[1:] if h is not None])
+        if not kept:  # smaller than the tolerance: keep the largest outline unsimplified
+            outlines = [polygon[0] for polygon in polygons if polygon[0] is not None]
+            kept = [[max(outlines, key=lambda r: abs(_signed_area(r)))]] if outlines else []
+        if not kept:
+            continue
+        ids.append(rid)
+        for polygon in kept:
+            for ring in polygon:
+                chunks.append(np.vstack([ring[:1], np.diff(ring, axis=0)]))
+                ring_offsets.append(ring_offsets[-1] + len(ring))
+            polygon_offsets.append(len(ring_offsets) - 1)
+        feature_offsets.append(len(polygon_offsets) - 1)
+    return {
+        "ids": np.array(ids, dtype=str),
+        "feature_offsets": np.array(feature_offsets, dtype=np.int32),
+        "polygon_offsets": np.array(polygon_offsets, dtype=np.int32),
+        "ring_offsets": np.array(ring_offsets, dtype=np.int32),
+        "points": np.vstack(chunks).astype(np.int32),
+        "transform": np.concatenate([step, origin]),
+    }
+
+
+def decode_layer(arrays, keep=None):
+    """GeoJSON FeatureCollection (``feature.id`` = region ID) from :func:`encode_layer` arrays,
+    optionally only the regions for which ``keep(region_id)`` is true."""
+    step, origin = arrays["transform"][:2], arrays["transform"][2:]
+    fo, po, ro, points = arrays["feature_offsets"], arrays["polygon_offsets"], arrays["ring_offsets"], arrays["points"]
+    features = []
+    for f, rid in enumerate(arrays["ids"].tolist()):
+        if keep is not None and not keep(rid):
+            continue
+        polygons = []
+        for p in range(fo[f], fo[f + 1]):
+            rings = []
+            for r in range(po[p], po[p + 1]):
+                ring = np.cumsum(points[ro[r]:ro[r + 1]], axis=0) * step + origin
+                ring = np.vstack([ring, ring[:1]]).round(DECIMALS)
+                rings.append(ring.tolist())
+            polygons.append(rings)
+        features.append({"type": "Feature", "id": rid, "properties": {"name": rid.rpartition("|")[2]},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    return {"type": "FeatureCollection", "features": features}
+
+
+# ---------------------- Preprocessing ----------------------
+def _property(props, candidates, override=None):
+    if override:
+        return props.get(override)
+    return next((props[c] for c in candidates if props.get(c)), None)
+
+
+def read_regions(path, layer, name_property=None, state_property=None):
+    """``({region_id: [polygon, ...]}, skipped)`` from a GeoJSON file; features with the same
+    canonical ID (a region split across features) are merged."""
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    regions, skipped = {}, []
+    for feature in collection.get("features", []):
+        props = feature.get("properties") or {}
+        geom = feature.get("geometry") or {}
+        name = _property(props, NAME_PROPERTIES[layer], name_property)
+        state = _property(props, STATE_PROPERTIES, state_property) if layer == "district" else name
+        if not name or not state or geom.get("type") not in ("Polygon", "MultiPolygon"):
+            skipped.append(str(name or props))
+            continue
+        coords = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        polygons = [[_open_ring(ring) for ring in polygon] for polygon in coords if polygon]
+        rid = region_id(state, name if layer == "district" else None)
+        regions.setdefault(rid, []).extend(p for p in polygons if len(p[0]) >= 3)
+    return {rid: polygons for rid, polygons in regions.items() if polygons}, skipped
+
+
+def data_regions(data_dir, layer):
+    """Region IDs the ingested data uses, or None when the layer's table has not been ingested."""
+    import memory_store
+
+    table = "map_hover_transactions" if layer == "state" else "map_transaction"
+    if not memory_store.available(data_dir, table):
+        return None
+    dims = query_layer.TABLES[table]["dims"]
+    columns = [dims[dim] for dim in ("state", "district")[:1 if layer == "state" else 2]]
+    df = memory_store.load_table(data_dir, table, columns=columns).drop_duplicates().astype(str)
+    return {region_id(*row) for row in df.itertuples(index=False)}
+
+
+def preprocess(path, layer, data_dir=DEFAULT_OUTPUT, name_property=None, state_property=None, zooms=ZOOMS):
+    """Simplify, quantize and store one layer at every zoom; returns a summary with match coverage."""
+    regions, skipped = read_regions(path, layer, name_property, state_property)
+    if not regions:
+        raise ValueError(f"no {layer} polygons found in {path}")
+    os.makedirs(os.path.join(data_dir, GEOMETRY_DIR), exist_ok=True)
+    points = sum(len(ring) for polygons in regions.values() for polygon in polygons for ring in polygon)
+    summary = {"regions": len(regions), "skipped": skipped, "input_points": points, "zooms": {}}
+    for zoom, tolerance in zooms.items():
+        arrays = encode_layer(regions, tolerance)
+        out = geometry_path(data_dir, layer, zoom)
+        tmp = out + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, out)
+        summary["zooms"][zoom] = {"points": len(arrays["points"]), "bytes": os.path.getsize(out)}
+    known = data_regions(data_dir, layer)
+    if known is not None:
+        summary["no_data"] = sorted(set(regions) - known)
+        summary["no_geometry"] = sorted(known - set(regions))
+    return summary
+
+
+# ---------------------- Loading ----------------------
+@functools.lru_cache(maxsize=16)
+def _load(path, mtime_ns, state):
+    with np.load(path) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    keep = None if state is None else (lambda rid: rid.startswith(state + "|"))
+    return decode_layer(arrays, keep)
+
+
+def load_geojson(data_dir, layer, zoom="medium", state=None):
+    """Decoded FeatureCollection (shared, treat as read-only), or None when not preprocessed.
+
+    ``state`` keeps one state's districts. Results are cached per file version.
+    """
+    path = geometry_path(data_dir, layer, zoom)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _load(path, mtime_ns, None if state is None else dimensions.norm_state(state))
+
+
+def region_ids(geojson):
+    return {feature["id"] for feature in geojson["features"]}
+
+
+def fingerprint(data_dir, layer, zoom):
+    """Short content hash of a stored layer (ETag material), or None when not preprocessed."""
+    path = geometry_path(data_dir, layer, zoom)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _digest(path, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=16)
+def _digest(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocess India boundary GeoJSON into the choropleth geometry cache.")
+    parser.add_argument("--states", help="state boundaries GeoJSON")
+    parser.add_argument("--districts", help="district boundaries GeoJSON")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--name-property", help="feature property with the region name (default: auto-detect)")
+    parser.add_argument("--state-property", help="district feature property with the state name (default: auto-detect)")
+    args = parser.parse_args(argv)
+
+    if not args.states and not args.districts:
+        parser.error("pass --states and/or --districts")
+    for layer, path in (("state", args.states), ("district", args.districts)):
+        if not path:
+            continue
+        summary = preprocess(path, layer, args.output, args.name_property, args.state_property)
+        input_kb = os.path.getsize(path) / 1024
+        print(f"🗺️ {layer}: {summary['regions']} regions, {summary['input_points']:,} points, {input_kb:,.0f} KB in")
+        for zoom, info in summary["zooms"].items():
+            print(f"   {zoom:<6} tolerance {ZOOMS[zoom]:g}°: {info['points']:,} points, {info['bytes'] / 1024:,.1f} KB")
+        if summary["skipped"]:
+            print(f"   ⚠️ skipped {len(summary['skipped'])} features without a name or polygon")
+        for key, label in (("no_data", "boundaries with no matching data"), ("no_geometry", "data regions without a boundary")):
+            if summary.get(key):
+                print(f"   ⚠️ {len(summary[key])} {label}: {', '.join(summary[key][:10])}"
+                      + (" …" if len(summary[key]) > 10 else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import cube
+import memory_store
+import query_layer
+
+ALL = "All"
+TOTAL = "All"
+
+# 📈 QoQ / YoY growth, trailing four-quarter sums and CAGR for every state, category and brand.
+# Each table is aggregated once per data version into a dense entity x quarter matrix (plus a total
+# row); every derived series is one shifted-array operation over the whole matrix.
+GROWTH_DIMS = cube.CUBE_DIMS
+SPARK_QUARTERS = 12
+
+
+def _ratio(now, before):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = now / before - 1
+    out[~(before > 0)] = np.nan
+    return out
+
+
+def shifted_growth(values, lag):
+    """``values[:, t] / values[:, t - lag] - 1`` for every row and column (NaN where undefined)."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] > lag:
+        out[:, lag:] = _ratio(values[:, lag:], values[:, :-lag])
+    return out
+
+
+def rolling_sum(values, window=4):
+    """Trailing ``window``-quarter sums; NaN until ``window`` observed quarters are available."""
+    filled = np.concatenate([np.zeros((len(values), 1)), np.nancumsum(values, axis=1)], axis=1)
+    seen = np.concatenate([np.zeros((len(values), 1)), np.cumsum(~np.isnan(values), axis=1)], axis=1)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        sums = filled[:, window:] - filled[:, :-window]
+        full = (seen[:, window:] - seen[:, :-window]) == window
+        out[:, window - 1:] = np.where(full, sums, np.nan)
+    return out
+
+
+def cagr(rolling):
+    """Annual growth rate of the trailing-year sum from each row's first full year to every quarter
+    (a since-inception CAGR, not a fixed trailing window)."""
+    valid = ~np.isnan(rolling)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), rolling.shape[1])
+    base = np.where(first < rolling.shape[1], rolling[np.arange(len(rolling)), np.minimum(first, rolling.shape[1] - 1)],
+                    np.nan)
+    years = (np.arange(rolling.shape[1])[None, :] - first[:, None]) / 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (rolling / base[:, None]) ** (1 / years) - 1
+    out[(years < 1) | ~(base[:, None] > 0) | ~(rolling > 0)] = np.nan
+    return out
+
+
+class GrowthMatrix:
+    """One table's per-entity quarterly totals as dense matrices, with every growth series precomputed.
+
+    Rows are the ``dim`` members plus a final ``TOTAL`` row; columns run quarter by quarter from the
+    first to the last period in the data, so a quarter with no rows is NaN rather than skipped.
+    """
+
+    def __init__(self, frame, dim, measures):
+        self.dim = dim
+        self.measures = measures
+        frame = memory_store.normalize_time(frame)
+        first_year, last_year = int(frame["year"].min()), int(frame["year"].max())
+        self.first = first_year * 4
+        columns = (frame["year"].to_numpy(np.int64) * 4 + frame["quarter"].to_numpy(np.int64) - 1) - self.first
+        width = (last_year * 4 + 3) - self.first + 1
+        codes, names = pd.factorize(frame[dim].astype(str))
+        self.entities = list(names) + [TOTAL]
+        self.values, self.qoq, self.yoy, self.rolling, self.cagr = {}, {}, {}, {}, {}
+        for m in measures:
+            values = np.full((len(names), width), np.nan)
+            values[codes, columns] = pd.to_numeric(frame[m], errors="coerce").to_numpy(np.float64)
+            total = np.where(np.isnan(values).all(axis=0), np.nan, np.nansum(values, axis=0))
+            values = np.vstack([values, total])
+            self.values[m] = values
+            self.qoq[m] = shifted_growth(values, 1)
+            self.yoy[m] = shifted_growth(values, 4)
+            self.rolling[m] = rolling_sum(values)
+            self.cagr[m] = cagr(self.rolling[m])
+        self._observed = np.flatnonzero(~np.isnan(self.values[measures[0]][-1]))
+        self._observed_year, self._observed_quarter = np.divmod(self.first + self._observed, 4)
+        self._observed_quarter += 1
+
+    def period(self, t):
+        year, quarter = divmod(self.first + t, 4)
+        return int(year), quarter + 1
+
+    def column(self, year=ALL, quarter=ALL):
+        """Latest observed quarter matching the sidebar filter, or None."""
+        q = query_layer.quarter_number(quarter)
+        match = np.ones(len(self._observed), dtype=bool)
+        if year != ALL:
+            match &= self._observed_year == int(year)
+        if q is not None:
+            match &= self._observed_quarter == q
+        observed = self._observed[match]
+        return int(observed[-1]) if len(observed) else None
+
+    def kpis(self, measure, year=ALL, quarter=ALL, entity=TOTAL):
+        """Value, QoQ, YoY, trailing-year sum and CAGR of one row at the filtered quarter."""
+        t = self.column(year, quarter)
+        if t is None:
+            return None
+        row = self.entities.index(entity)
+        pick = lambda series: None if np.isnan(series[measure][row, t]) else float(series[measure][row, t])
+        year_, quarter_ = self.period(t)
+        return {"period": f"Q{quarter_} {year_}", "value": pick(self.values), "qoq": pick(self.qoq),
+                "yoy": pick(self.yoy), "trailing_year": pick(self.rolling), "cagr": pick(self.cagr),
+                "trend": self.spark(measure, t)[row]}
+
+    def spark(self, measure, t, quarters=SPARK_QUARTERS):
+        """Each row's last ``quarters`` values up to column ``t`` (NaN -> None for charting)."""
+        window = self.values[measure][:, max(0, t - quarters + 1):t + 1]
+        return [[None if np.isnan(v) else float(v) for v in row] for row in window]
+
+    def table(self, measure, year=ALL, quarter=ALL):
+        """Value, QoQ, YoY, CAGR and sparkline per row at the filtered quarter: the total first,
+        then the members largest first."""
+        t = self.column(year, quarter)
+        if t is None:
+            return pd.DataFrame(columns=[self.dim, measure, "qoq", "yoy", "cagr", "trend"])
+        out = pd.DataFrame({
+            self.dim: self.entities,
+            measure: self.values[measure][:, t],
+            "qoq": self.qoq[measure][:, t],
+            "yoy": self.yoy[measure][:, t],
+            "cagr": self.cagr[measure][:, t],
+            "trend": self.spark(measure, t),
+        })
+        members = out.iloc[:-1].sort_values(measure, ascending=False, na_position="last")
+        return pd.concat([out.iloc[-1:], members], ignore_index=True)
+
+
+class Growth:
+    """Growth matrices for one data version, built on first use per table and then shared."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._matrices = {}
+
+    def adopt(self, previous, changes=None):
+        """Carry over every matrix ``previous`` had: reuse those of tables outside ``changes`` (an
+        incremental ingest) and rebuild the others now, before this version serves requests.
+        ``changes=None`` (a full reload) rebuilds them all.
+        """
+        with previous._lock:
+            keys = list(previous._matrices)
+            kept = {key: previous._matrices[key] for key in keys
+                    if changes is not None and key[0] not in changes}
+        with self._lock:
+            self._matrices.update(kept)
+        for key in keys:
+            self.matrix(*key)
+
+    def matrix(self, table, dim=None):
+        dim = dim or GROWTH_DIMS[table][0]
+        key = (table, dim)
+        if key not in self._matrices:
+            with self._lock:
+                if key not in self._matrices:
+                    self._matrices[key] = self._build(table, dim)
+        return self._matrices[key]
+
+    def _build(self, table, dim):
+        if not self.backend.available(table):
+            return None
+        frame = self.backend.aggregate(table, [dim, "year", "quarter"], where=query_layer.with_basis(table))
+        if frame.empty:
+            return None
+        return GrowthMatrix(frame, dim, query_layer.TABLES[table]["measures"])
@@ -0,0 +1,455 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cube
+import dimensions
+import storage
+from manifest import load_manifest, save_manifest, stat_unchanged
+
+# 📁 Configurable roots (CLI flags override these)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.environ.get("PULSE_DATA_ROOT", os.path.join(PROJECT_DIR, "pulse", "data"))
+DEFAULT_OUTPUT = os.environ.get("PULSE_OUTPUT_DIR", os.path.join(PROJECT_DIR, "output"))
+
+# 🧱 Dataset name -> (CSV file, headers)
+DATASETS = {
+    "transaction_categories": ("transaction_categories.csv", ["year", "quarter", "category", "count", "amount"]),
+    "map_hover_transactions": ("map_hover_transactions.csv", ["year", "quarter", "district", "count", "amount"]),
+    "user_device_data": ("user_device_data.csv", ["year", "quarter", "brand", "count", "percentage"]),
+    "insurance_data": ("insurance_data.csv", ["level", "state", "year", "quarter", "type", "count", "amount"]),
+    # District-level hover data from map/<kind>/hover/country/india/state/<state>/<year>/<q>.json
+    "map_transaction": ("map_transaction.csv", ["year", "quarter", "state", "district", "count", "amount"]),
+    "map_user": ("map_user.csv", ["year", "quarter", "state", "district", "registered_users", "app_opens"]),
+    "map_insurance": ("map_insurance.csv",
+                      ["year", "quarter", "state", "district", "insurance_type", "count", "amount"]),
+    # Top-10 lists from top/<kind>/country/india[/state/<state>]/<year>/<q>.json. `scope` is the file's
+    # region ("India" or a state), `level` is state/district/pincode and `entity` the ranked name or PIN
+    "top_transaction": ("top_transaction.csv", ["year", "quarter", "scope", "level", "entity", "count", "amount"]),
+    "top_user": ("top_user.csv", ["year", "quarter", "scope", "level", "entity", "registered_users"]),
+    "top_insurance": ("top_insurance.csv", ["year", "quarter", "scope", "level", "entity", "count", "amount"]),
+}
+
+# 🔑 Columns that identify which source file a row came from
+KEY_COLUMNS = {
+    "transaction_categories": ["year", "quarter"],
+    "map_hover_transactions": ["year", "quarter"],
+    "user_device_data": ["year", "quarter"],
+    "insurance_data": ["level", "state", "year", "quarter"],
+    "map_transaction": ["state", "year", "quarter"],
+    "map_user": ["state", "year", "quarter"],
+    "map_insurance": ["state", "year", "quarter"],
+    "top_transaction": ["scope", "year", "quarter"],
+    "top_user": ["scope", "year", "quarter"],
+    "top_insurance": ["scope", "year", "quarter"],
+}
+
+
+# ---------------------- Routing ----------------------
+def classify(rel_path):
+    """Map a path under the data root to (dataset, meta), or None if no dataset reads it."""
+    parts = rel_path.replace("\\", "/").split("/")
+    if not parts[-1].endswith(".json"):
+        return None
+    quarter = os.path.splitext(parts[-1])[0]
+    head = parts[:-2]
+
+    if head == ["aggregated", "transaction", "country", "india"]:
+        return "transaction_categories", {"year": parts[-2], "quarter": quarter}
+    if head == ["map", "transaction", "hover", "country", "india"]:
+        return "map_hover_transactions", {"year": parts[-2], "quarter": quarter}
+    if head == ["aggregated", "user", "country", "india"]:
+        return "user_device_data", {"year": parts[-2], "quarter": quarter}
+    if head == ["aggregated", "insurance", "country", "india"]:
+        return "insurance_data", {"year": parts[-2], "quarter": quarter, "level": "Country", "state": "India"}
+    if head[:-1] == ["aggregated", "insurance", "country", "india", "state"]:
+        return "insurance_data", {"year": parts[-2], "quarter": quarter, "level": "State", "state": head[-1]}
+    if (len(head) == 7 and head[0] == "map" and head[1] in ("transaction", "user", "insurance")
+            and head[2:6] == ["hover", "country", "india", "state"]):
+        # District tables carry canonical state names, so SQL filters can use them directly
+        return f"map_{head[1]}", {"year": parts[-2], "quarter": quarter, "state": dimensions.norm_state(head[-1])}
+    if head[0:1] == ["top"] and len(head) > 1 and head[1] in ("transaction", "user", "insurance"):
+        if head[2:] == ["country", "india"]:
+            return f"top_{head[1]}", {"year": parts[-2], "quarter": quarter, "scope": "India"}
+        if len(head) == 6 and head[2:5] == ["country", "india", "state"]:
+            return f"top_{head[1]}", {"year": parts[-2], "quarter": quarter, "scope": dimensions.norm_state(head[-1])}
+    return None
+
+
+def source_key(dataset, meta):
+    """Key shared by every row one source file produces, formatted like the CSV values."""
+    values = dict(meta, year=str(int(meta["year"])), quarter=str(int(meta["quarter"])))
+    if dataset == "insurance_data":
+        values["quarter"] = f"Q{values['quarter']}"
+    return [values[col] for col in KEY_COLUMNS[dataset]]
+
+
+def row_key(dataset, row):
+    return [str(row[col]) for col in KEY_COLUMNS[dataset]]
+
+
+def key_partition(dataset, key):
+    """(year, quarter) ints of a source key."""
+    values = dict(zip(KEY_COLUMNS[dataset], key))
+    return int(values["year"]), int(str(values["quarter"]).lstrip("Q"))
+
+
+def discover(root, datasets=None):
+    """Walk the data tree once and return (path, dataset, meta) tasks in a stable order."""
+    tasks = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for file_name in sorted(filenames):
+            file_path = os.path.join(dirpath, file_name)
+            routed = classify(os.path.relpath(file_path, root))
+            if routed is None:
+                continue
+            dataset, meta = routed
+            if datasets is None or dataset in datasets:
+                tasks.append((file_path, dataset, meta))
+    return tasks
+
+
+# ---------------------- Parsers ----------------------
+def _transaction_categories(data, meta):
+    rows = []
+    for entry in data.get("transactionData") or []:
+        for instrument in entry.get("paymentInstruments", []):
+            if instrument.get("type") == "TOTAL":
+                rows.append({
+                    "year": meta["year"],
+                    "quarter": meta["quarter"],
+                    "category": entry.get("name", ""),
+                    "count": instrument.get("count", 0),
+                    "amount": instrument.get("amount", 0.0),
+                })
+    return rows
+
+
+def _map_hover_transactions(data, meta):
+    hover_data = data.get("hoverDataList")
+    if not hover_data:
+        raise ValueError("no hover data")
+    rows = []
+    for district_obj in hover_data:
+        for metric in district_obj.get("metric", []):
+            if metric.get("type") == "TOTAL":
+                rows.append({
+                    "year": meta["year"],
+                    "quarter": int(meta["quarter"]),
+                    "district": district_obj.get("name"),
+                    "count": metric.get("count", 0),
+                    "amount": metric.get("amount", 0),
+                })
+                break
+    return rows
+
+
+def _user_device_data(data, meta):
+    users_by_device = data.get("usersByDevice")
+    if not users_by_device:
+        raise ValueError("missing usersByDevice")
+    return [{
+        "year": meta["year"],
+        "quarter": meta["quarter"],
+        "brand": device.get("brand", "Unknown"),
+        "count": device.get("count", 0),
+        "percentage": device.get("percentage", 0.0),
+    } for device in users_by_device]
+
+
+def _insurance_data(data, meta):
+    rows = []
+    for txn in data.get("transactionData") or []:
+        if txn.get("name") == "Insurance":
+            for instrument in txn.get("paymentInstruments", []):
+                rows.append({
+                    "level": meta["level"],
+                    "state": meta["state"],
+                    "year": int(meta["year"]),
+                    "quarter": f"Q{meta['quarter']}",
+                    "type": instrument.get("type"),
+                    "count": instrument.get("count"),
+                    "amount": instrument.get("amount"),
+                })
+    return rows
+
+
+def _map_transaction(data, meta):
+    rows = []
+    for district_obj in data.get("hoverDataList") or []:
+        for metric in district_obj.get("metric", []):
+            if metric.get("type") == "TOTAL":
+                rows.append({
+                    "year": meta["year"],
+                    "quarter": meta["quarter"],
+                    "state": meta["state"],
+                    "district": dimensions.norm_district(district_obj.get("name")),
+                    "count": metric.get("count", 0),
+                    "amount": metric.get("amount", 0.0),
+                })
+    return rows
+
+
+def _map_user(data, meta):
+    return [{
+        "year": meta["year"],
+        "quarter": meta["quarter"],
+        "state": meta["state"],
+        "district": dimensions.norm_district(name),
+        "registered_users": values.get("registeredUsers", 0),
+        "app_opens": values.get("appOpens", 0),
+    } for name, values in (data.get("hoverData") or {}).items()]
+
+
+def _map_insurance(data, meta):
+    rows = []
+    for district_obj in data.get("hoverDataList") or []:
+        for metric in district_obj.get("metric", []):
+            rows.append({
+                "year": meta["year"],
+                "quarter": meta["quarter"],
+                "state": meta["state"],
+                "district": dimensions.norm_district(district_obj.get("name")),
+                "insurance_type": metric.get("type"),
+                "count": metric.get("count", 0),
+                "amount": metric.get("amount", 0.0),
+            })
+    return rows
+
+
+# Country files rank states; state files rank that state's districts and pincodes. A district or
+# pincode in the national top 10 is always in its own state's top 10, so the state files suffice.
+TOP_LEVELS = {"states": "state", "districts": "district", "pincodes": "pincode"}
+
+
+def _top_entity(level, name):
+    if level == "state":
+        return dimensions.norm_state(name)
+    if level == "district":
+        return dimensions.norm_district(name)
+    return str(name).strip()
+
+
+def _top_rows(data, meta, measures):
+    rows = []
+    for group, level in TOP_LEVELS.items():
+        if (level == "state") != (meta["scope"] == "India"):
+            continue
+        for entry in data.get(group) or []:
+            name = entry.get("entityName") or entry.get("name")
+            if name is None:
+                continue
+            row = {"year": meta["year"], "quarter": meta["quarter"], "scope": meta["scope"],
+                   "level": level, "entity": _top_entity(level, name)}
+            row.update(measures(entry))
+            rows.append(row)
+    return rows
+
+
+def _top_metric(entry):
+    metric = entry.get("metric") or {}
+    return {"count": metric.get("count", 0), "amount": metric.get("amount", 0.0)}
+
+
+def _top_transaction(data, meta):
+    return _top_rows(data, meta, _top_metric)
+
+
+def _top_user(data, meta):
+    return _top_rows(data, meta, lambda entry: {"registered_users": entry.get("registeredUsers", 0)})
+
+
+def _top_insurance(data, meta):
+    return _top_rows(data, meta, _top_metric)
+
+
+PARSERS = {
+    "transaction_categories": _transaction_categories,
+    "map_hover_transactions": _map_hover_transactions,
+    "user_device_data": _user_device_data,
+    "insurance_data": _insurance_data,
+    "map_transaction": _map_transaction,
+    "map_user": _map_user,
+    "map_insurance": _map_insurance,
+    "top_transaction": _top_transaction,
+    "top_user": _top_user,
+    "top_insurance": _top_insurance,
+}
+
+
+def parse_file(task):
+    """Worker entry point: parse one JSON file into (dataset, rows, error, sha256).
+
+    ``rows`` is None when the content hash matches ``known_sha`` (touched but unchanged).
+    """
+    file_path, dataset, meta, known_sha = task
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        sha = hashlib.sha256(raw).hexdigest()
+        if sha == known_sha:
+            return dataset, None, None, sha
+        data = json.loads(raw).get("data") or {}
+        return dataset, PARSERS[dataset](data, meta), None, sha
+    except Exception as e:
+        return dataset, [], f"{file_path}: {e}", None
+
+
+# ---------------------- Engine ----------------------
+def run_tasks(tasks, workers=None):
+    """Fan ``parse_file`` out over a process pool, yielding results in task order."""
+    if not tasks:
+        return
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_file, tasks, chunksize=chunksize)
+
+
+def ingest(root=DEFAULT_ROOT, datasets=None, workers=None):
+    """Parse every routed file under ``root`` across a process pool.
+
+    Returns ``{dataset: rows}`` for all requested datasets, in discovery order.
+    """
+    tasks = [(path, dataset, meta, None) for path, dataset, meta in discover(root, datasets)]
+    results = {name: [] for name in (datasets or DATASETS)}
+    for dataset, rows, error, _ in run_tasks(tasks, workers):
+        if error:
+            print(f"⚠️ Skipped {error}")
+        results[dataset].extend(rows)
+    return results
+
+
+def read_csv(output_dir, dataset):
+    file_name, _ = DATASETS[dataset]
+    with open(os.path.join(output_dir, file_name), "r", newline="", encoding="utf-8") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def write_csv(output_dir, dataset, rows):
+    file_name, headers = DATASETS[dataset]
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, file_name)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=headers, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def incremental_ingest(root=DEFAULT_ROOT, output_dir=DEFAULT_OUTPUT, datasets=None, workers=None, full=False,
+                       parquet=False):
+    """Parse only new or changed files and merge their rows into the existing CSVs.
+
+    Rows whose source key belongs to a changed or deleted file are replaced. A dataset
+    whose CSV is missing (or ``full=True``) is rebuilt from every file. With ``parquet=True``
+    the typed, year/quarter-partitioned copy is kept in sync, rewriting only touched partitions.
+    Returns ``{dataset: {"parsed": n, "rows": n, "path": p, "partitions": [[year, quarter], ...]}}``
+    for datasets that changed; ``partitions`` is None when the dataset was rebuilt.
+    """
+    datasets = list(datasets or DATASETS)
+    old_files = {} if full else load_manifest(output_dir)
+    rebuild = {d for d in datasets if full or not os.path.exists(os.path.join(output_dir, DATASETS[d][0]))
+               or (parquet and not storage.exists(output_dir, d))}
+
+    files, tasks = {}, []
+    for file_path, dataset, meta in discover(root, datasets):
+        rel_path = os.path.relpath(file_path, root).replace("\\", "/")
+        st = os.stat(file_path)
+        entry = old_files.get(rel_path)
+        files[rel_path] = {"dataset": dataset, "key": source_key(dataset, meta),
+                           "size": st.st_size, "mtime": st.st_mtime_ns}
+        if dataset not in rebuild and entry and stat_unchanged(entry, st):
+            files[rel_path]["sha256"] = entry["sha256"]
+            continue
+        known_sha = entry.get("sha256") if entry and dataset not in rebuild else None
+        tasks.append((file_path, dataset, meta, known_sha))
+
+    # 🗑️ Files that vanished since the last run take their rows with them
+    stale = {d: set() for d in datasets}
+    for rel_path, entry in old_files.items():
+        if rel_path not in files and entry.get("dataset") in stale:
+            stale[entry["dataset"]].add(tuple(entry["key"]))
+
+    fresh = {d: [] for d in datasets}
+    parsed = {d: 0 for d in datasets}
+    for (file_path, dataset, meta, _), (_, rows, error, sha) in zip(tasks, run_tasks(tasks, workers)):
+        rel_path = os.path.relpath(file_path, root).replace("\\", "/")
+        if error:
+            print(f"⚠️ Skipped {error}")
+            files.pop(rel_path)  # retried on the next run
+            continue
+        files[rel_path]["sha256"] = sha
+        if rows is None:
+            continue
+        parsed[dataset] += 1
+        stale[dataset].add(tuple(files[rel_path]["key"]))
+        fresh[dataset].extend(rows)
+
+    summary, changed_rows, changed_partitions = {}, {}, {}
+    for dataset in datasets:
+        if dataset not in rebuild and not stale[dataset]:
+            continue
+        kept = [] if dataset in rebuild else [
+            row for row in read_csv(output_dir, dataset) if tuple(row_key(dataset, row)) not in stale[dataset]
+        ]
+        merged = kept + fresh[dataset]
+        touched = None if dataset in rebuild else {key_partition(dataset, k) for k in stale[dataset]}
+        summary[dataset] = {"parsed": parsed[dataset], "rows": len(merged),
+                            "path": write_csv(output_dir, dataset, merged),
+                            "partitions": None if touched is None else [list(p) for p in sorted(touched)]}
+        if parquet:
+            storage.write_partitions(output_dir, dataset, merged, touched)
+        changed_partitions[dataset] = touched
+        changed_rows[dataset] = merged if touched is None else [
+            row for row in merged if key_partition(dataset, row_key(dataset, row)) in touched
+        ]
+
+    # 🧊 Rollups and dimension tables for the dashboard: only the touched partitions' rows are
+    # merged into the existing files; they are built from every CSV when missing, or when the cube
+    # was built under another format or basis (see cube.FORMAT_VERSION)
+    if not cube.is_current(output_dir) or not os.path.exists(os.path.join(output_dir, "dim_state.csv")):
+        _, rows_by_table = cube.rebuild_cube(output_dir)
+        dimensions.write_dimension_tables(output_dir, rows_by_table)
+    elif summary:
+        cube.update_cube(output_dir, changed_rows, changed_partitions)
+        dimensions.write_dimension_tables(output_dir, changed_rows, merge=True)
+
+    # Entries for datasets outside this run are carried over untouched
+    for rel_path, entry in old_files.items():
+        if entry.get("dataset") not in datasets:
+            files[rel_path] = entry
+    save_manifest(output_dir, files)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest the PhonePe Pulse data tree in one parallel pass.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="pulse/data directory")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory for the CSV outputs")
+    parser.add_argument("--dataset", action="append", choices=sorted(DATASETS),
+                        help="only build this dataset (repeatable; default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and rebuild from every file")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also write typed Parquet partitioned by year/quarter under <output>/parquet")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"data root not found: {args.root}")
+
+    summary = incremental_ingest(args.root, args.output, args.dataset, args.workers,
+                                 full=args.full, parquet=args.parquet)
+    if not summary:
+        print("✅ Everything up to date — no new or changed files.")
+    for dataset, info in summary.items():
+        print(f"✅ Parsed {info['parsed']} changed files; saved {info['rows']} {dataset} records to {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
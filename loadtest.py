@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ingest import DEFAULT_OUTPUT, PROJECT_DIR
+
+# 🚦 Simulated dashboard sessions clicking around output/app.py, headless, against the local backend.
+# AppTest is not thread-safe, so each worker process runs its sessions one rerun at a time (sharing
+# that process's caches, like sessions on one server); parallelism comes from --processes.
+APP_PATH = os.path.join(PROJECT_DIR, "output", "app.py")
+ACTIONS = ("year", "quarter", "view", "tab")
+LABELS = {"year": "Select Year", "quarter": "Select Quarter", "view": "Select view:"}
+
+
+def rss_mb():
+    """Current resident set size (Linux), else the peak."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _widget(at, kind, label=None, key=None):
+    widgets = at.selectbox if kind == "selectbox" else at.radio
+    return next((w for w in widgets if (key is None or w.key == key) and (label is None or w.label == label)), None)
+
+
+def _choose(at, action, rnd):
+    """Set one widget to a random other value; returns False when this page has no such widget."""
+    if action == "tab":
+        widget = _widget(at, "radio", key="active_view")
+    elif action == "view":
+        widget = _widget(at, "radio", label=LABELS["view"])
+    else:
+        widget = _widget(at, "selectbox", label=LABELS[action])
+    if widget is None or len(widget.options) < 2:
+        return False
+    choice = rnd.choice([o for o in widget.options if o != str(widget.value)] or widget.options)
+    (widget.select if action in ("year", "quarter") else widget.set_value)(choice)
+    return True
+
+
+def run_worker(worker, sessions, duration, actions, seed, timeout):
+    """One process: open ``sessions`` AppTest sessions and click through them round-robin."""
+    from streamlit.testing.v1 import AppTest
+
+    rnd = random.Random(seed * 1000 + worker)
+    rss_start = rss_mb()
+    samples = []  # (action, seconds)
+    errors = []
+
+    apps = []
+    for _ in range(sessions):
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        samples.append(("open", time.perf_counter() - start))
+        apps.append(at)
+    rss_opened = rss_mb()
+
+    deadline = time.perf_counter() + duration if duration else None
+    done = 0
+    while (deadline and time.perf_counter() < deadline) or (not deadline and done < actions * sessions):
+        at = apps[done % sessions]
+        done += 1
+        action = rnd.choice(ACTIONS)
+        if not _choose(at, action, rnd):
+            continue
+        start = time.perf_counter()
+        at.run()
+        samples.append((action, time.perf_counter() - start))
+        if at.exception:
+            errors.append(at.exception[0].message)
+    return {"worker": worker, "pid": os.getpid(), "samples": samples, "errors": errors,
+            "rss_start_mb": rss_start, "rss_opened_mb": rss_opened, "rss_end_mb": rss_mb()}
+
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    if not len(ms):
+        return {"n": 0}
+    return {"n": int(len(ms)), **{f"p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in (50, 95, 99)},
+            "max_ms": round(float(ms.max()), 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with simulated concurrent sessions.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--sessions", type=int, default=8, help="simulated sessions in total")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="worker processes the sessions are spread over")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run (0: use --actions)")
+    parser.add_argument("--actions", type=int, default=20, help="clicks per session when --duration is 0")
+    parser.add_argument("--backend", default="memory", choices=["memory", "duckdb", "mysql", "auto"],
+                        help="PULSE_BACKEND for the simulated sessions (default: memory, measuring the app "
+                             "rather than a database)")
+    parser.add_argument("--lazy-tabs", action="store_true", help="run with PULSE_LAZY_TABS=1 and switch views")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    args = parser.parse_args(argv)
+
+    os.environ["PULSE_OUTPUT_DIR"] = args.output
+    os.environ["PULSE_BACKEND"] = args.backend
+    os.environ["PULSE_LAZY_TABS"] = "1" if args.lazy_tabs else "0"
+    processes = max(1, min(args.processes, args.sessions))
+    per_worker = [args.sessions // processes + (i < args.sessions % processes) for i in range(processes)]
+
+    # AppTest replaces __main__ in the process running it; send tasks by module name
+    import loadtest
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(loadtest.run_worker, range(processes), per_worker,
+                                [args.duration] * processes, [args.actions] * processes,
+                                [args.seed] * processes, [args.timeout] * processes))
+    wall = time.perf_counter() - start
+
+    clicks = [(a, s) for r in results for a, s in r["samples"] if a != "open"]
+    print(f"🚦 {args.sessions} sessions over {processes} processes on the {args.backend} backend, {wall:.1f}s wall")
+    print(f"   reruns: {len(clicks)}  throughput: {len(clicks) / wall:.1f} reruns/s")
+    print(f"   session open: {latency_summary([s for r in results for a, s in r['samples'] if a == 'open'])}")
+    print(f"   all clicks:   {latency_summary([s for _, s in clicks])}")
+    for action in ACTIONS:
+        seconds = [s for a, s in clicks if a == action]
+        if seconds:
+            print(f"   {action:<13} {latency_summary(seconds)}")
+    for r in results:
+        print(f"   worker {r['worker']} (pid {r['pid']}): rss {r['rss_start_mb']} -> {r['rss_opened_mb']} MB "
+              f"after opening sessions -> {r['rss_end_mb']} MB "
+              f"(+{r['rss_end_mb'] - r['rss_opened_mb']:.1f} MB while clicking)")
+    errors = [e for r in results for e in r["errors"]]
+    if errors:
+        print(f"❌ {len(errors)} reruns raised; first: {errors[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import os
+
+# 🧾 Record of every source file the ingestion step has processed
+MANIFEST_FILE = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_dir):
+    return os.path.join(output_dir, MANIFEST_FILE)
+
+
+def load_manifest(output_dir):
+    """Return ``{rel_path: entry}``; an unreadable or missing manifest means nothing was processed."""
+    try:
+        with open(manifest_path(output_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(output_dir, files):
+    """Write the manifest atomically so a crashed run never leaves a half-written file."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = manifest_path(output_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stat_unchanged(entry, st):
+    """Cheap check: same size and mtime means the file does not need rehashing."""
+    return bool(entry) and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns
+
+
+def manifest_hash(files):
+    """Stable digest of the processed file set, usable as a data version."""
+    digest = hashlib.sha256()
+    for rel_path in sorted(files):
+        digest.update(rel_path.encode("utf-8"))
+        digest.update(files[rel_path].get("sha256", "").encode("ascii"))
+    return digest.hexdigest()[:16]
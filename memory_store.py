@@ -0,0 +1,308 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import dimensions
+import query_layer
+import storage
+from ingest import DATASETS
+
+ALL = "All"
+
+# 🗺️ Compact tables published once per data version as Arrow IPC files that every process maps
+SNAPSHOT_DIR = "snapshots"
+DIMS_METADATA = b"pulse.dimensions"
+SHARED_ENV = "PULSE_SHARED_SNAPSHOT"
+KEEP_SNAPSHOTS = 2
+
+
+def normalize_time(df):
+    """Typed ``year`` (int16) and ``quarter`` (int8) columns, parsed once at load time.
+
+    Quarters such as "Q2" are handled by parsing the distinct values only, not every row.
+    """
+    year = pd.to_numeric(df["year"], errors="coerce")
+    quarter = df["quarter"]
+    if not pd.api.types.is_numeric_dtype(quarter):
+        codes, uniques = pd.factorize(quarter.astype(str), use_na_sentinel=True)
+        parsed = pd.to_numeric(pd.Series(uniques).str.extract(r"(\d+)", expand=False), errors="coerce")
+        quarter = pd.Series(np.where(codes >= 0, parsed.to_numpy()[codes], np.nan), index=df.index)
+    quarter = pd.to_numeric(quarter, errors="coerce")
+    keep = year.notna() & quarter.notna()
+    return df[keep].assign(year=year[keep].astype("int16"), quarter=quarter[keep].clip(1, 4).astype("int8"))
+
+
+def _smallest_int(values):
+    values = np.asarray(values)
+    for dtype in (np.int8, np.int16, np.int32):
+        if len(values) == 0 or (values.min() >= np.iinfo(dtype).min and values.max() <= np.iinfo(dtype).max):
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def compact_table(df, table):
+    """Compact fact table: int16 year, int8 quarter, integer dimension keys, categorical labels,
+    float64 amount and int64 for the other measures (counts, users, app opens). Raw name strings and
+    derived columns (percentage) are dropped; names live in the dimension tables and shares are
+    computed on demand.
+    """
+    spec = query_layer.TABLES[table]
+    df = normalize_time(df)
+    columns = {"year": df["year"].to_numpy(), "quarter": df["quarter"].to_numpy()}
+    for dim, col in spec["dims"].items():
+        if dim in dimensions.DIMENSIONS:
+            columns[f"{dim}_id"] = _smallest_int(dimensions.DIMENSIONS[dim].encode(df[col]))
+        else:
+            columns[col] = pd.Categorical(df[col])
+    for m in spec["measures"]:
+        values = pd.to_numeric(df[m], errors="coerce").fillna(0)
+        columns[m] = values.to_numpy(np.float64 if m == "amount" else np.int64)
+    return pd.DataFrame(columns)
+
+
+def memory_report(frames):
+    """Bytes held per dataset: ``{name: DataFrame or PartitionIndex}`` -> one row each."""
+    rows = []
+    for name, obj in frames.items():
+        frame = obj.frame if isinstance(obj, PartitionIndex) else obj
+        total = obj.nbytes() if isinstance(obj, PartitionIndex) else int(frame.memory_usage(deep=True).sum())
+        rows.append({"dataset": name, "rows": len(frame), "bytes": total,
+                     "bytes_per_row": round(total / len(frame), 1) if len(frame) else 0.0})
+    return pd.DataFrame(rows)
+
+
+def sort_columns(table):
+    """Physical row order: (year, quarter), then the partition key's ID column if the table has one."""
+    within = query_layer.TABLES[table].get("partition")
+    return ["year", "quarter"] + ([f"{within}_id"] if within else [])
+
+
+class PartitionIndex:
+    """(year, quarter) -> contiguous row ranges of one table, optionally split further by ``within``.
+
+    Rows are sorted by (year, quarter[, within]) once (or arrive sorted from a shared snapshot),
+    so a period or a whole year is a single ``iloc`` slice, "All years, one quarter" is one
+    slice per year, and one ``within`` key (e.g. a state) is one slice per period. Slices are
+    views: nothing here copies the fact columns.
+    """
+
+    def __init__(self, df, mapped=False, within=None):
+        order = ["year", "quarter"] + ([within] if within else [])
+        keys = np.column_stack([df[col].to_numpy().astype(np.int64) for col in order]) if len(df) else None
+        if len(df) > 1 and not _is_sorted(keys):
+            df = df.sort_values(order, kind="stable").reset_index(drop=True)
+            keys = np.column_stack([df[col].to_numpy().astype(np.int64) for col in order])
+        self.frame = df
+        self.mapped = mapped
+        self.within = within
+        self.periods = {}
+        self.years = {}
+        self.groups = {}
+        if len(df):
+            for start, end in _runs(keys[:, :2]):
+                y, q = int(keys[start, 0]), int(keys[start, 1])
+                self.periods[(y, q)] = (start, end)
+                first, _ = self.years.get(y, (start, 0))
+                self.years[y] = (first, end)
+            if within:
+                for start, end in _runs(keys):
+                    self.groups[tuple(int(k) for k in keys[start])] = (start, end)
+
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum())
+
+    def slices(self, year=ALL, quarter=ALL, key=None):
+        """Views covering the selection; with ``key`` (a ``within`` value) only that key's rows."""
+        q = query_layer.quarter_number(quarter)
+        if key is not None:
+            bounds = [self.groups.get((y, pq, int(key))) for y, pq in self.periods
+                      if (year == ALL or y == int(year)) and (q is None or pq == q)]
+        elif year == ALL and q is None:
+            return [self.frame]
+        elif year == ALL:
+            bounds = [self.periods[(y, q)] for y in sorted(self.years) if (y, q) in self.periods]
+        else:
+            bounds = [self.years.get(int(year)) if q is None else self.periods.get((int(year), q))]
+        bounds = [b for b in bounds if b is not None]
+        return [self.frame.iloc[start:end] for start, end in bounds] or [self.frame.iloc[0:0]]
+
+
+def _is_sorted(keys):
+    """Lexicographic order check in one pass: the first differing column of each pair must increase."""
+    diff = keys[1:] - keys[:-1]
+    first = np.argmax(diff != 0, axis=1)
+    return bool((diff[np.arange(len(diff)), first] >= 0).all())
+
+
+def _runs(keys):
+    """(start, end) of each run of identical rows in a sorted 2-D key array."""
+    change = np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)]
+    starts = np.flatnonzero(change)
+    ends = np.r_[starts[1:], len(keys)]
+    return [(int(s), int(e)) for s, e in zip(starts, ends)]
+
+
+def shared_enabled():
+    return storage.pa is not None and os.environ.get(SHARED_ENV, "1").lower() not in ("0", "false", "no")
+
+
+def snapshot_path(data_dir, version, table):
+    return os.path.join(data_dir, SNAPSHOT_DIR, version, f"{table}.arrow")
+
+
+def publish_snapshot(data_dir, version, table, df):
+    """Write a compact, (year, quarter)-sorted table as an uncompressed Arrow IPC file.
+
+    The file appears atomically, so concurrent publishers of the same version are harmless.
+    """
+    pa = storage.pa
+    path = snapshot_path(data_dir, version, table)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = df.sort_values(sort_columns(table), kind="stable")
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    # Dimension IDs are assigned per process; ship the names so readers can map them back
+    names = {dim: list(dimensions.DIMENSIONS[dim].names)
+             for dim in query_layer.TABLES[table]["dims"] if dim in dimensions.DIMENSIONS}
+    metadata = {**(arrow_table.schema.metadata or {}), DIMS_METADATA: json.dumps(names).encode("utf-8")}
+    arrow_table = arrow_table.replace_schema_metadata(metadata)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    os.replace(tmp_path, path)
+    prune_snapshots(data_dir, keep=version)
+    return path
+
+
+def map_snapshot(path):
+    """DataFrame over a memory-mapped snapshot file.
+
+    Numeric columns point straight into the mapping (shared page cache across sessions and
+    processes); only categorical codes, and ID columns whose numbering differs from this
+    process's dimensions, are materialized.
+    """
+    pa = storage.pa
+    arrow_table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    df = arrow_table.to_pandas(split_blocks=True, self_destruct=False)
+    names = json.loads((arrow_table.schema.metadata or {}).get(DIMS_METADATA, b"{}"))
+    remapped = {}
+    for dim, dim_names in names.items():
+        local = dimensions.DIMENSIONS[dim].adopt(dim_names)
+        if not np.array_equal(local[:-1], np.arange(len(dim_names))):
+            remapped[f"{dim}_id"] = _smallest_int(local[df[f"{dim}_id"].to_numpy()])
+    return df.assign(**remapped) if remapped else df
+
+
+def prune_snapshots(data_dir, keep, count=KEEP_SNAPSHOTS):
+    """Drop all but the newest ``count`` snapshot versions (``keep`` always survives).
+
+    Processes still mapping a removed file keep their pages until they unmap it.
+    """
+    root = os.path.join(data_dir, SNAPSHOT_DIR)
+    try:
+        versions = sorted(os.scandir(root), key=lambda e: e.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    survivors = {keep} | {e.name for e in versions[:count]}
+    for entry in versions:
+        if entry.name not in survivors and entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def load_index(data_dir, table, version=None):
+    """Partition index for ``table``: mapped from the version's shared snapshot when possible
+    (publishing it first if this process is the first to ask), else built in this process.
+    """
+    within = (sort_columns(table)[2:] or [None])[0]
+    if version and shared_enabled():
+        path = snapshot_path(data_dir, version, table)
+        if not os.path.exists(path):
+            publish_snapshot(data_dir, version, table, _compact(data_dir, table))
+        return PartitionIndex(map_snapshot(path), mapped=True, within=within)
+    return PartitionIndex(_compact(data_dir, table), within=within)
+
+
+def patch_index(data_dir, table, old, partitions, version=None):
+    """Partition index for a new data version in which only ``partitions`` of ``table`` changed.
+
+    Rows of every other (year, quarter) are kept from ``old``; only the changed partitions are read
+    (pruned Parquet, else a filtered CSV). With shared snapshots the result is published for
+    ``version``, or mapped if another process already did.
+    """
+    path = snapshot_path(data_dir, version, table) if version and shared_enabled() else None
+    if path and os.path.exists(path):
+        return PartitionIndex(map_snapshot(path), mapped=True, within=old.within)
+    frame = old.frame
+    changed = np.array([int(y) * 4 + int(q) for y, q in partitions], dtype=np.int64)
+    period = frame["year"].to_numpy(np.int64) * 4 + frame["quarter"].to_numpy(np.int64)
+    merged = pd.concat([frame[~np.isin(period, changed)], load_partitions(data_dir, table, partitions)],
+                       ignore_index=True)
+    # Categories differ between the two halves; re-derive them so the columns stay categorical
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            merged[col] = pd.Categorical(merged[col])
+    if path:
+        publish_snapshot(data_dir, version, table, merged)
+        return PartitionIndex(map_snapshot(path), mapped=True, within=old.within)
+    return PartitionIndex(merged, within=old.within)
+
+
+def load_partitions(data_dir, table, partitions):
+    """Compact rows of only the given (year, quarter) partitions of ``table``."""
+    spec = query_layer.TABLES[table]
+    columns = ["year", "quarter"] + list(spec["dims"].values()) + spec["measures"]
+    partitions = sorted({(int(y), int(q)) for y, q in partitions})
+    if storage.pa is not None and storage.exists(data_dir, table):
+        df = pd.concat([storage.read_dataset(data_dir, table, columns, y, q) for y, q in partitions],
+                       ignore_index=True)
+    else:
+        df = normalize_time(load_table(data_dir, table, columns))
+        period = df["year"].to_numpy(np.int64) * 4 + df["quarter"].to_numpy(np.int64)
+        df = df[np.isin(period, [y * 4 + q for y, q in partitions])]
+    return compact_table(df, table)
+
+
+def _compact(data_dir, table):
+    spec = query_layer.TABLES[table]
+    columns = ["year", "quarter"] + list(spec["dims"].values()) + spec["measures"]
+    return compact_table(load_table(data_dir, table, columns), table)
+
+
+def available(data_dir, table):
+    """Whether ingestion has produced ``table`` (as Parquet or CSV)."""
+    return (storage.pa is not None and storage.exists(data_dir, table)) or \
+        os.path.exists(os.path.join(data_dir, DATASETS[table][0]))
+
+
+def load_table(data_dir, table, columns=None):
+    """One dataset as a DataFrame from Parquet when present, else from its CSV."""
+    if storage.pa is not None and storage.exists(data_dir, table):
+        return storage.read_dataset(data_dir, table, columns)
+    df = pd.read_csv(os.path.join(data_dir, DATASETS[table][0]))
+    return df[columns] if columns else df
+
+
+def main(argv=None):
+    import argparse
+
+    from ingest import DEFAULT_OUTPUT
+
+    parser = argparse.ArgumentParser(description="Report in-memory size of each dataset, raw vs compact.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    args = parser.parse_args(argv)
+
+    raw = {t: load_table(args.output, t) for t in query_layer.TABLES if available(args.output, t)}
+    report = memory_report(raw).merge(
+        memory_report({t: compact_table(df, t) for t, df in raw.items()}),
+        on=["dataset", "rows"], suffixes=("_raw", "_compact"),
+    )
+    report["ratio"] = (report["bytes_raw"] / report["bytes_compact"]).round(1)
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
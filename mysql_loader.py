@@ -0,0 +1,244 @@
+import argparse
+import csv
+import os
+import re
+import time
+
+from ingest import DATASETS, DEFAULT_OUTPUT
+from manifest import load_manifest, manifest_hash
+
+# 🔐 Connection settings (same defaults as output/app.py)
+MYSQL_CONFIG = {
+    "host": os.environ.get("PULSE_MYSQL_HOST", "localhost"),
+    "user": os.environ.get("PULSE_MYSQL_USER", "root"),
+    "password": os.environ.get("PULSE_MYSQL_PASSWORD", "12345"),
+    "database": os.environ.get("PULSE_MYSQL_DATABASE", "phonepe_dashboard"),
+}
+
+# 🧱 Dashboard tables: natural primary keys + covering (year, quarter, label) indexes.
+# Quarter is stored as TINYINT everywhere ("Q2" in insurance_data.csv is converted on load).
+# The DDL lives in the SQL script only; the loader reads its CREATE TABLE statements from there.
+SQL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "Phone pay project SQL connect.sql")
+
+
+def load_schema(path=SQL_SCRIPT):
+    """CREATE TABLE IF NOT EXISTS statements and primary-key columns for the ingested tables in the script."""
+    with open(path, encoding="utf-8") as f:
+        script = f.read()
+    schema, keys = {}, {}
+    for table, body in re.findall(r"CREATE TABLE (\w+) \((.*?)\n\);", script, re.S):
+        if table not in DATASETS:
+            continue
+        schema[table] = f"CREATE TABLE IF NOT EXISTS {table} ({body}\n)"
+        keys[table] = [col.strip() for col in re.search(r"PRIMARY KEY \(([^)]*)\)", body).group(1).split(",")]
+    return schema, keys
+
+
+# Columns forming each table's primary key (everything else is updated on conflict)
+SCHEMA, PRIMARY_KEYS = load_schema()
+
+# 🏷️ One-row table the dashboard polls to notice new loads
+VERSION_TABLE = "data_version"
+VERSION_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+        id TINYINT PRIMARY KEY,
+        version VARCHAR(64) NOT NULL,
+        loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )"""
+
+
+def get_connection(**overrides):
+    import mysql.connector
+
+    return mysql.connector.connect(**dict(MYSQL_CONFIG, **overrides))
+
+
+def create_tables(cursor, tables, recreate=False):
+    for table in tables:
+        if recreate:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(SCHEMA[table])
+
+
+def stamp_version(conn, output_dir):
+    """Record the loaded data version: the ingest manifest hash, or the load time without one."""
+    files = load_manifest(output_dir)
+    version = manifest_hash(files) if files else f"load-{int(time.time())}"
+    cursor = conn.cursor()
+    cursor.execute(VERSION_SCHEMA)
+    cursor.execute(f"REPLACE INTO {VERSION_TABLE} (id, version) VALUES (1, %s)", (version,))
+    conn.commit()
+    cursor.close()
+    return version
+
+
+def upsert_sql(table):
+    """INSERT ... ON DUPLICATE KEY UPDATE for one table: re-runs overwrite, never duplicate."""
+    _, headers = DATASETS[table]
+    updates = [col for col in headers if col not in PRIMARY_KEYS[table]]
+    columns = ", ".join(f"`{col}`" for col in headers)
+    placeholders = ", ".join(["%s"] * len(headers))
+    assignments = ", ".join(f"`{col}` = VALUES(`{col}`)" for col in updates)
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {assignments}"
+
+
+def _typed(row, headers):
+    values = []
+    for col in headers:
+        value = row.get(col)
+        if value in (None, ""):
+            values.append(None)
+        elif col == "quarter":
+            values.append(int(str(value).upper().lstrip("Q")))
+        elif col in ("year", "count", "registered_users", "app_opens"):
+            values.append(int(float(value)))
+        elif col in ("amount", "percentage"):
+            values.append(float(value))
+        else:
+            values.append(value)
+    return values
+
+
+def check_primary_keys(table, csv_path, partitions=None):
+    """Raise ValueError if two CSV rows share a primary key (e.g. districts that canonicalize to one name).
+
+    An upsert or REPLACE would otherwise keep only the last of them without a word.
+    """
+    _, headers = DATASETS[table]
+    key_idx = [headers.index(col) for col in PRIMARY_KEYS[table]]
+    wanted = {(int(y), int(q)) for y, q in partitions} if partitions is not None else None
+    seen, collisions = set(), {}
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values = _typed(row, headers)
+            if wanted is not None and (values[headers.index("year")], values[headers.index("quarter")]) not in wanted:
+                continue
+            key = tuple(values[i] for i in key_idx)
+            if key in seen:
+                collisions[key] = collisions.get(key, 1) + 1
+            seen.add(key)
+    if collisions:
+        examples = "; ".join(f"{key} x{n}" for key, n in list(collisions.items())[:5])
+        raise ValueError(
+            f"{csv_path}: {len(collisions)} duplicate {table} primary key(s) "
+            f"({', '.join(PRIMARY_KEYS[table])}), e.g. {examples}"
+        )
+
+
+def load_executemany(conn, table, csv_path, batch_size=5000):
+    """Stream the CSV into batched upserts; returns rows sent."""
+    check_primary_keys(table, csv_path)
+    _, headers = DATASETS[table]
+    sql = upsert_sql(table)
+    cursor = conn.cursor()
+    sent, batch = 0, []
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            batch.append(_typed(row, headers))
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                sent += len(batch)
+                batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        sent += len(batch)
+    conn.commit()
+    cursor.close()
+    return sent
+
+
+def load_partitions(conn, table, csv_path, partitions, batch_size=5000):
+    """Replace only the given (year, quarter) partitions: delete their rows, insert the CSV's rows for them.
+
+    Rows dropped from a partition (e.g. a deleted source file) disappear too, unlike a plain upsert.
+    """
+    check_primary_keys(table, csv_path, partitions)
+    _, headers = DATASETS[table]
+    wanted = {(int(y), int(q)) for y, q in partitions}
+    cursor = conn.cursor()
+    cursor.executemany(f"DELETE FROM {table} WHERE year = %s AND quarter = %s", sorted(wanted))
+    sql = upsert_sql(table)
+    sent, batch = 0, []
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values = _typed(row, headers)
+            if (values[headers.index("year")], values[headers.index("quarter")]) not in wanted:
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                sent += len(batch)
+                batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        sent += len(batch)
+    conn.commit()
+    cursor.close()
+    return sent
+
+
+def _line_terminator(csv_path):
+    """LOAD DATA line terminator matching the file: CRLF for older ingests, LF for current ones."""
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+    return "\\r\\n" if header.endswith(b"\r\n") else "\\n"
+
+
+def load_infile(conn, table, csv_path):
+    """LOAD DATA LOCAL INFILE ... REPLACE: server-side bulk load, idempotent on the primary key."""
+    check_primary_keys(table, csv_path)
+    _, headers = DATASETS[table]
+    targets = ", ".join("@quarter" if col == "quarter" else f"`{col}`" for col in headers)
+    sql = (
+        f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {table} "
+        "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        f"LINES TERMINATED BY '{_line_terminator(csv_path)}' IGNORE 1 LINES "
+        f"({targets}) SET quarter = CAST(REPLACE(@quarter, 'Q', '') AS UNSIGNED)"
+    )
+    cursor = conn.cursor()
+    cursor.execute(sql, (os.path.abspath(csv_path),))
+    loaded = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create keyed dashboard tables in MySQL and bulk-upsert the CSVs.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested CSVs")
+    parser.add_argument("--table", action="append", choices=sorted(SCHEMA), help="only load this table (repeatable)")
+    parser.add_argument("--infile", action="store_true", help="use LOAD DATA LOCAL INFILE instead of executemany")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--recreate", action="store_true", help="drop and recreate tables (adds keys to old tables)")
+    parser.add_argument("--schema-only", action="store_true", help="create tables and indexes without loading")
+    args = parser.parse_args(argv)
+
+    tables = args.table or list(SCHEMA)
+    conn = get_connection(allow_local_infile=args.infile)
+    cursor = conn.cursor()
+    create_tables(cursor, tables, recreate=args.recreate)
+    conn.commit()
+    cursor.close()
+    print(f"✅ Tables ready: {', '.join(tables)}")
+
+    if not args.schema_only:
+        for table in tables:
+            csv_path = os.path.join(args.output, DATASETS[table][0])
+            if not os.path.exists(csv_path):
+                print(f"⛔ Skipping {table}: {csv_path} not found")
+                continue
+            try:
+                if args.infile:
+                    count = load_infile(conn, table, csv_path)
+                else:
+                    count = load_executemany(conn, table, csv_path, args.batch_size)
+            except ValueError as exc:
+                print(f"⛔ Skipping {table}: {exc}")
+                continue
+            print(f"✅ Upserted {count} rows into {table}")
+        print(f"🏷️ Data version {stamp_version(conn, args.output)}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
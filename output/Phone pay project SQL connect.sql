@@ -1,87 +1,140 @@
 CREATE DATABASE phonepe_dashboard;
 USE phonepe_dashboard;
+-- Natural primary keys make re-loads idempotent (see mysql_loader.py for the upserting loader);
+-- (year, quarter, ...) leading keys/indexes keep filtered dashboard queries off full table scans.
 CREATE TABLE aggregated_user (
-    year INT,
-    quarter INT,
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
     registered_users BIGINT,
-    app_opens BIGINT
+    app_opens BIGINT,
+    PRIMARY KEY (year, quarter)
 );
 
 CREATE TABLE aggregated_transaction (
-    year INT,
-    quarter INT,
-    transaction_type VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    transaction_type VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, transaction_type)
 );
 
 CREATE TABLE aggregated_insurance (
-    year INT,
-    quarter INT,
-    insurance_type VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    insurance_type VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, insurance_type)
 );
 CREATE TABLE map_user (
-    year INT,
-    quarter INT,
-    state VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    district VARCHAR(100) NOT NULL,
     registered_users BIGINT,
-    app_opens BIGINT
+    app_opens BIGINT,
+    PRIMARY KEY (year, quarter, state, district),
+    INDEX idx_map_user_state (state, year, quarter, district, registered_users, app_opens)
 );
 
 CREATE TABLE map_transaction (
-    year INT,
-    quarter INT,
-    state VARCHAR(100),
-    district VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    district VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, state, district),
+    INDEX idx_map_transaction_state (state, year, quarter, district, count, amount)
 );
 
 CREATE TABLE map_insurance (
-    year INT,
-    quarter INT,
-    state VARCHAR(100),
-    district VARCHAR(100),
-    insurance_type VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    district VARCHAR(100) NOT NULL,
+    insurance_type VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, state, district, insurance_type),
+    INDEX idx_map_insurance_state (state, year, quarter, district, count, amount)
 );
 
+-- Top-10 lists: scope is the source file's region ('India' or a state), level is state/district/pincode
 CREATE TABLE top_user (
-    year INT,
-    quarter INT,
-    state VARCHAR(100),
-    district VARCHAR(100),
-    pin_code VARCHAR(20),
-    registered_users BIGINT
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    scope VARCHAR(100) NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    entity VARCHAR(100) NOT NULL,
+    registered_users BIGINT,
+    PRIMARY KEY (year, quarter, scope, level, entity),
+    INDEX idx_top_user_level (level, year, quarter, registered_users)
 );
 
 CREATE TABLE top_transaction (
-    year INT,
-    quarter INT,
-    state VARCHAR(100),
-    district VARCHAR(100),
-    pin_code VARCHAR(20),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    scope VARCHAR(100) NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    entity VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, scope, level, entity),
+    INDEX idx_top_transaction_level (level, year, quarter, amount, count)
 );
 
 CREATE TABLE top_insurance (
-    year INT,
-    quarter INT,
-    insurance_type VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    scope VARCHAR(100) NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    entity VARCHAR(100) NOT NULL,
+    count BIGINT,
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, scope, level, entity),
+    INDEX idx_top_insurance_level (level, year, quarter, amount, count)
+);
+
+-- Dashboard tables (created and bulk-loaded by `python mysql_loader.py`)
+CREATE TABLE insurance_data (
+    level VARCHAR(20) NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    count BIGINT,
+    amount DOUBLE,
+    PRIMARY KEY (level, state, year, quarter, type),
+    INDEX idx_insurance_yq_state (year, quarter, state, count, amount)
+);
+
+CREATE TABLE map_hover_transactions (
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    district VARCHAR(100) NOT NULL,
+    count BIGINT,
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, district)
+);
+
+CREATE TABLE transaction_categories (
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    category VARCHAR(100) NOT NULL,
     count BIGINT,
-    amount DOUBLE
+    amount DOUBLE,
+    PRIMARY KEY (year, quarter, category)
 );
 
 CREATE TABLE user_device_data (
-    year INT,
-    quarter INT,
-    brand VARCHAR(100),
+    year SMALLINT NOT NULL,
+    quarter TINYINT NOT NULL,
+    brand VARCHAR(100) NOT NULL,
     count BIGINT,
-    percentage DOUBLE
+    percentage DOUBLE,
+    PRIMARY KEY (year, quarter, brand)
 );
 
 SELECT COUNT(*) FROM insurance_data;
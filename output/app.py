@@ -1,144 +1,173 @@
 # app.py
+import functools
+import os
+import shutil
+import sys
+import tempfile
+
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import mysql.connector
+import plotly
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+# Shared modules (storage, ingest, ...) live in the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cube
+import dimensions
+import figure_cache
+import geometry
+import growth
+import profiling
+import query_layer
+import rankings
+import snapshots
 
 # ---------------------- Page setup ----------------------
 st.set_page_config(page_title="PhonePe Pulse Dashboard", layout="wide")
 
-# ---------------------- MySQL Connection ----------------------
-def get_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="12345",
-        database="phonepe_dashboard"
-    )
-
-# ---------------------- Load Data ----------------------
-@st.cache_data(show_spinner=False)
-def load_data():
-    conn = get_connection()
-    insurance_df = pd.read_sql("SELECT * FROM insurance_data", conn)
-    hover_df     = pd.read_sql("SELECT * FROM map_hover_transactions", conn)
-    category_df  = pd.read_sql("SELECT * FROM transaction_categories", conn)
-    device_df    = pd.read_sql("SELECT * FROM user_device_data", conn)
-    conn.close()
-    return insurance_df, hover_df, category_df, device_df
-
-insurance_df, hover_df, category_df, device_df = load_data()
-
-# ---------------------- Name helpers ----------------------
-_STATE_FIX = {
-    "andaman & nicobar islands": "Andaman and Nicobar Islands",
-    "andaman and nicobar isl": "Andaman and Nicobar Islands",
-    "delhi": "NCT of Delhi",
-    "nct of delhi": "NCT of Delhi",
-    "jammu & kashmir": "Jammu and Kashmir",
-    "dadra & nagar haveli and daman & diu": "Dadra and Nagar Haveli and Daman and Diu",
-    "dadra and nagar haveli": "Dadra and Nagar Haveli and Daman and Diu",
-    "daman and diu": "Dadra and Nagar Haveli and Daman and Diu",
-    "arunanchal pradesh": "Arunachal Pradesh",
-    "telengana": "Telangana",
-    "odisha": "Odisha",
-}
-
-def norm_state(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-    key = s.strip().lower().replace("&", "and")
-    key = " ".join(key.split())
-    return _STATE_FIX.get(key, key.title())
-
-# ---------------------- Filters helpers ----------------------
-def normalize_years(df: pd.DataFrame) -> pd.Series:
-    if "year" not in df.columns:
-        return pd.Series([], dtype=int)
-    return pd.to_numeric(df["year"], errors="coerce").dropna().astype(int)
-
-def normalize_quarters(df: pd.DataFrame) -> pd.Series:
-    if "quarter" not in df.columns:
-        return pd.Series([], dtype=object)
-    q = (df["quarter"].astype(str)
-         .str.extract(r"(\d+)", expand=False)
-         .astype(float).dropna().astype(int)
-         .clip(1, 4)
-         .apply(lambda x: f"Q{x}"))
-    return q
-
-def to_quarter_int(q_label: str):
-    if q_label == "All":
-        return None
-    try:
-        return int(str(q_label).replace("Q", "").strip())
-    except Exception:
-        return None
-
-def apply_year_quarter_filters(df: pd.DataFrame, year_sel, q_sel):
-    out = df.copy()
-    if "year" in out.columns and year_sel != "All":
-        out = out[pd.to_numeric(out["year"], errors="coerce") == int(year_sel)]
-    if "quarter" in out.columns and q_sel != "All":
-        q_num = to_quarter_int(q_sel)
-        q_col_num = out["quarter"].astype(str).str.extract(r"(\d+)", expand=False).astype(float)
-        out = out[q_col_num == float(q_num)]
-    return out
-
-# ---------------------- India state centroids ----------------------
-STATE_CENTROIDS = {
-    "Andhra Pradesh": (15.9129, 79.7400),
-    "Arunachal Pradesh": (28.2180, 94.7278),
-    "Assam": (26.2006, 92.9376),
-    "Bihar": (25.0961, 85.3131),
-    "Chhattisgarh": (21.2787, 81.8661),
-    "Goa": (15.2993, 74.1240),
-    "Gujarat": (22.2587, 71.1924),
-    "Haryana": (29.0588, 76.0856),
-    "Himachal Pradesh": (31.1048, 77.1734),
-    "Jharkhand": (23.6102, 85.2799),
-    "Karnataka": (15.3173, 75.7139),
-    "Kerala": (10.8505, 76.2711),
-    "Madhya Pradesh": (22.9734, 78.6569),
-    "Maharashtra": (19.7515, 75.7139),
-    "Manipur": (24.6637, 93.9063),
-    "Meghalaya": (25.4670, 91.3662),
-    "Mizoram": (23.1645, 92.9376),
-    "Nagaland": (26.1584, 94.5624),
-    "Odisha": (20.9517, 85.0985),
-    "Punjab": (31.1471, 75.3412),
-    "Rajasthan": (27.0238, 74.2179),
-    "Sikkim": (27.5330, 88.5122),
-    "Tamil Nadu": (11.1271, 78.6569),
-    "Telangana": (18.1124, 79.0193),
-    "Tripura": (23.9408, 91.9882),
-    "Uttar Pradesh": (27.5706, 80.0982),
-    "Uttarakhand": (30.0668, 79.0193),
-    "West Bengal": (22.9868, 87.8550),
-    "Andaman and Nicobar Islands": (11.7401, 92.6586),
-    "Chandigarh": (30.7333, 76.7794),
-    "Dadra and Nagar Haveli and Daman and Diu": (20.3000, 73.0000),
-    "NCT of Delhi": (28.7041, 77.1025),
-    "Jammu and Kashmir": (33.7782, 76.5762),
-    "Ladakh": (34.1526, 77.5770),
-    "Lakshadweep": (10.5667, 72.6417),
-    "Puducherry": (11.9416, 79.8083),
-}
+# ---------------------- Instrumentation ----------------------
+# Each stage of a rerun records wall time, rows and cache outcome. PULSE_DEBUG=1 (or ?debug=1) shows
+# them in the sidebar, PULSE_TIMING_LOG=1 logs one JSON line per rerun, and PULSE_METRICS_PORT
+# serves process-wide totals at /metrics for scraping.
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    profiling.configure_logging()
+    metrics = profiling.Metrics()
+    if os.environ.get(profiling.METRICS_PORT_ENV):
+        profiling.serve_metrics(metrics, os.environ[profiling.METRICS_PORT_ENV])
+    return metrics
+
+def report_rerun(kind, total_ms, records):
+    get_metrics().observe(kind, total_ms, records)
+    profiling.log_rerun(kind, total_ms, records, version=snapshot.version,
+                        year=selected_year, quarter=selected_quarter)
+
+DEBUG = os.environ.get(profiling.DEBUG_ENV) == "1" or st.query_params.get("debug") == "1"
+recorder = profiling.RerunRecorder(report_rerun)
+rerun_profile = profiling.RerunProfile() if DEBUG and st.session_state.pop("profile_next", False) else None
+
+# ---------------------- Storage backend ----------------------
+# PULSE_BACKEND = auto | mysql | duckdb | memory (see backends.py). Every backend answers the same
+# aggregate() calls, so an embedded DuckDB replica and the MySQL deployment render identical tabs.
+DATA_DIR = os.environ.get("PULSE_OUTPUT_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# ---------------------- Data snapshot ----------------------
+# One store per server process. It serves the current (backend, cube) snapshot and rebuilds it in
+# a background thread when the data version changes (new ingest or MySQL load), swapping it in
+# atomically, so reruns never wait on a reload. Set PULSE_REFRESH_SECONDS to tune polling.
+@st.cache_resource(show_spinner=False)
+def get_store():
+    return snapshots.SnapshotStore(DATA_DIR)
+
+with recorder.stage("snapshot"):
+    snapshot = get_store().current()
+
+# ---------------------- Query layer ----------------------
+# Tabs read the precomputed cube by key; anything it does not cover runs in the backend,
+# where filtering and GROUP BY happen before rows reach the app.
+def aggregate(table: str, by=(), year_sel="All", q_sel="All", where=None) -> pd.DataFrame:
+    with recorder.stage("aggregate", detail=f"{table}[{','.join(by)}]") as rec:
+        use_cube = snapshot.cube is not None and not where
+        out = snapshot.cube.lookup(table, by, year_sel, q_sel) if use_cube else None
+        rec["cache"] = "cube"
+        if out is None:
+            rec["cache"] = "hit"  # aggregate_backend flips this to "miss" when it actually runs
+            out = aggregate_backend(snapshot, snapshot.version, table, tuple(by), year_sel, q_sel,
+                                    tuple(sorted((where or {}).items())))
+        rec["rows"] = len(out)
+        return out
+
+# Keyed on the data version (the snapshot object itself is not hashed), so a new version
+# never serves results cached from the old one.
+@st.cache_data(show_spinner=False, max_entries=1024)
+def aggregate_backend(_snapshot, version: str, table: str, by=(), year_sel="All", q_sel="All",
+                      where=()) -> pd.DataFrame:
+    recorder.note(cache="miss")
+    return _snapshot.backend.aggregate(table, list(by), year_sel, q_sel,
+                                       query_layer.with_basis(table, dict(where)))
+
+# ---------------------- Figure cache ----------------------
+# Built figures are shared across sessions and reused while the view, filters and data version match.
+# They are also persisted in the on-disk result cache, which `warmup.py` fills before a deploy.
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return figure_cache.FigureCache(int(os.environ.get("PULSE_FIGURE_CACHE_SIZE", figure_cache.DEFAULT_MAX_ENTRIES)),
+                                    store=get_store().result_cache)
+
+def cached_figure(fig_id: str, year_sel, q_sel, build, view=None):
+    key = (fig_id, str(year_sel), str(q_sel), view, snapshot.version)
+    with recorder.stage("figure", detail=fig_id) as rec:
+        rec["cache"] = "hit"
+
+        def build_and_note():
+            recorder.note(cache="miss")
+            return build()
+
+        return get_figure_cache().get_or_build(key, build_and_note)
+
+# ---------------------- Growth ----------------------
+# QoQ/YoY/CAGR and sparklines come from the snapshot's growth matrices (one per table and data
+# version, every entity computed at once), read at the latest quarter matching the filters.
+def growth_matrix(table):
+    with recorder.stage("growth", detail=table) as rec:
+        matrix = snapshot.growth.matrix(table)
+        rec["rows"] = 0 if matrix is None else len(matrix.entities)
+        return matrix
+
+def pct(value):
+    return "–" if value is None else f"{value:+.1%}"
+
+def growth_kpis(table, measure, label, year_sel, q_sel):
+    matrix = growth_matrix(table)
+    kpis = matrix.kpis(measure, year_sel, q_sel) if matrix is not None else None
+    if kpis is None:
+        return
+    c1, c2, c3 = st.columns(3)
+    c1.metric(f"{label} – {kpis['period']}", f"{kpis['value'] or 0:,.0f}",
+              None if kpis["qoq"] is None else f"{pct(kpis['qoq'])} QoQ")
+    c2.metric("Year over Year", pct(kpis["yoy"]))
+    c3.metric("CAGR since first full year", pct(kpis["cagr"]))
+
+def growth_panel(table, measure, label, year_sel, q_sel):
+    matrix = growth_matrix(table)
+    if matrix is None:
+        return
+    with st.expander(f"📈 {label} growth by {matrix.dim}"):
+        growth_kpis(table, measure, label, year_sel, q_sel)
+        st.dataframe(
+            matrix.table(measure, year_sel, q_sel), use_container_width=True, hide_index=True,
+            column_config={
+                measure: st.column_config.NumberColumn(label, format="%.0f"),
+                "qoq": st.column_config.NumberColumn("QoQ", format="percent"),
+                "yoy": st.column_config.NumberColumn("YoY", format="percent"),
+                "cagr": st.column_config.NumberColumn("CAGR", format="percent",
+                                                      help="Annual growth of the trailing-year sum since the first full year"),
+                "trend": st.column_config.LineChartColumn(f"Last {growth.SPARK_QUARTERS} quarters"),
+            },
+        )
 
 # ---------------------- Build filter options ----------------------
-all_years = sorted(
-    set(normalize_years(insurance_df)) |
-    set(normalize_years(hover_df)) |
-    set(normalize_years(category_df)) |
-    set(normalize_years(device_df))
-)
-all_quarters = sorted(
-    set(normalize_quarters(insurance_df)) |
-    set(normalize_quarters(hover_df)) |
-    set(normalize_quarters(category_df)) |
-    set(normalize_quarters(device_df)),
-    key=lambda x: int(x.replace("Q", ""))
-)
+# Once per data version, from the cube's per-period totals of the tab tables: no table is scanned,
+# so lazy mode loads nothing a view does not ask for. The district tables come from the same map
+# files as map_hover_transactions and add no periods; without a cube the backend is queried.
+@st.cache_data(show_spinner=False, max_entries=4)
+def filter_options(_snapshot, version: str):
+    tables = [t for t in (cube.CUBE_DIMS if _snapshot.cube is not None else query_layer.TABLES)
+              if _snapshot.backend.available(t)]
+    periods = pd.concat([pd.DataFrame(columns=["year", "quarter"])] + [
+        (_snapshot.cube.lookup(t, ("year", "quarter")) if _snapshot.cube is not None
+         else _snapshot.backend.aggregate(t, ["year", "quarter"]))[["year", "quarter"]]
+        for t in tables])
+    years = sorted(set(pd.to_numeric(periods["year"], errors="coerce").dropna().astype(int)))
+    quarters = [f"Q{q}" for q in sorted(set(pd.to_numeric(periods["quarter"], errors="coerce")
+                                            .dropna().astype(int).clip(1, 4)))]
+    return years, quarters
+
+with recorder.stage("filter_options"):
+    all_years, all_quarters = filter_options(snapshot, snapshot.version)
 
 # ---------------------- Sidebar ----------------------
 st.sidebar.header("📌 Filters")
@@ -148,142 +177,252 @@ selected_year = st.sidebar.selectbox("Select Year", year_options, index=0)
 selected_quarter = st.sidebar.selectbox("Select Quarter", quarter_options, index=0)
 
 # ---------------------- Tabs ----------------------
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🛡️ Insurance Summary",
-    "🗺️ State-Level Transaction Map",
-    "📂 Transaction Categories",
-    "📱 Device Usage",
-    "📊 Summary Insights"
-])
+# Each view is a fragment: a widget inside it (e.g. the map tab's "Select view") reruns only that
+# view. With PULSE_LAZY_TABS=1 only the selected view is computed at all; st.tabs runs every tab.
+LAZY_TABS = os.environ.get("PULSE_LAZY_TABS", "0") == "1"
+
+def timed_view(tab):
+    """Time a whole view as one stage; its aggregates and figures are recorded under the same tab."""
+    def wrap(render):
+        @functools.wraps(render)
+        def run(selected_year, selected_quarter):
+            with recorder.stage("view", tab=tab):
+                return render(selected_year, selected_quarter)
+        return run
+    return wrap
 
 # ---------------------- 1) Insurance Summary ----------------------
-with tab1:
+@st.fragment
+@timed_view("insurance")
+def render_insurance(selected_year, selected_quarter):
     st.subheader("🛡️ Insurance Coverage Summary")
 
-    df_ins_f = apply_year_quarter_filters(insurance_df, selected_year, selected_quarter)
+    ins_by_state = aggregate("insurance_data", ["state"], selected_year, selected_quarter)
 
-    if df_ins_f.empty:
+    if ins_by_state.empty:
         st.warning("No insurance data available for the selected filters.")
     else:
-        total_value = pd.to_numeric(df_ins_f.get("amount"), errors="coerce").fillna(0).sum()
-        total_policies = pd.to_numeric(df_ins_f.get("count"), errors="coerce").fillna(0).sum()
+        total_value = ins_by_state["amount"].sum()
+        total_policies = ins_by_state["count"].sum()
 
         c1, c2, c3 = st.columns(3)
         c1.metric("💰 Total Insurance Value", f"₹{total_value:,.2f}")
         c2.metric("🧾 Total Policies Issued", f"{int(total_policies):,}")
         c3.metric("📆 Filter", f"{selected_quarter}, {selected_year}" if selected_year!="All" or selected_quarter!="All" else "All Data")
 
-        label_col = "state" if "state" in df_ins_f.columns else "district"
-        df_ins_f["state_norm"] = df_ins_f[label_col].astype(str).apply(norm_state)
-
-        state_summary = (
-            df_ins_f.assign(amount=pd.to_numeric(df_ins_f.get("amount"), errors="coerce").fillna(0),
-                            count=pd.to_numeric(df_ins_f.get("count"), errors="coerce").fillna(0))
-                     .groupby("state_norm", as_index=False)
-                     .agg(total_value=("amount", "sum"),
-                          total_policies=("count", "sum"))
-                     .sort_values("total_value", ascending=False)
+        state_summary = rankings.top_rows(
+            ins_by_state.rename(columns={"state": "state_norm", "amount": "total_value", "count": "total_policies"}),
+            "total_value", 20,
         )
 
         st.subheader("🗺️ Top 20 States by Insurance Value")
-        fig_state = px.bar(
-            state_summary.head(20),
+        fig_state = cached_figure("insurance_top20", selected_year, selected_quarter, lambda: px.bar(
+            state_summary,
             x="state_norm", y="total_value",
             hover_data=["total_policies"],
             title="Top 20 States by Insurance Value",
             labels={"total_value": "Total Value", "state_norm": "State"},
             color="total_value",
             color_continuous_scale="Blues"
-        )
+        ))
         st.plotly_chart(fig_state, use_container_width=True)
+        growth_panel("insurance_data", "amount", "Insurance value", selected_year, selected_quarter)
 
 # ---------------------- 2) State-Level Transaction Map ----------------------
-with tab2:
+# Boundaries come from `python geometry.py` (output/geometry/), decoded once per process and zoom
+# level; without them the map falls back to bubbles at the state centroids. Choropleths are drawn by
+# output/choropleth_component/, which keeps the geometry in the browser: a session receives each
+# boundary set once, and filter changes send only the locations and values.
+MAP_ZOOM = "medium"
+DISTRICT_ZOOM = "high"
+CHOROPLETH_HEIGHT = 520
+
+def boundaries(layer, zoom, state=None):
+    with recorder.stage("geometry", detail=f"{layer}:{zoom}") as rec:
+        geo = geometry.load_geojson(DATA_DIR, layer, zoom, state)
+        rec["rows"] = 0 if geo is None else len(geo["features"])
+        return geo
+
+@st.cache_resource(show_spinner=False)
+def choropleth_component():
+    # Served from a scratch copy of the component next to the plotly.js bundle the plotly package ships
+    path = os.path.join(tempfile.gettempdir(), f"pulse_choropleth_{plotly.__version__}")
+    os.makedirs(path, exist_ok=True)
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "choropleth_component", "index.html"), path)
+    bundle = os.path.join(path, "plotly.min.js")
+    if not os.path.exists(bundle):
+        with open(bundle + ".tmp", "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        os.replace(bundle + ".tmp", bundle)
+    return components.declare_component("pulse_choropleth", path=path)
+
+# Geometry and layout as figure JSON, serialized once per boundary file, zoom level and state
+@st.cache_resource(show_spinner=False, max_entries=64)
+def choropleth_base(layer, zoom, state, fingerprint):
+    return go.Figure(go.Choropleth(
+        geojson=boundaries(layer, zoom, state), featureidkey="id", locations=[], z=[],
+        colorscale="Viridis", colorbar={"title": {"text": "total_amount"}},
+        hovertemplate="<b>%{hovertext}</b><br>total_amount=%{z:,}<br>total_count=%{customdata[0]:,d}<extra></extra>",
+    )).update_geos(fitbounds="locations", visible=False).update_layout(margin=dict(l=0, r=0, t=60, b=0)).to_json()
+
+def choropleth(key, layer, zoom, df, locations, hover_name, title, state=None):
+    fingerprint = geometry.fingerprint(DATA_DIR, layer, zoom)
+    geometry_id = f"{layer}:{zoom}:{state or ''}:{fingerprint}"
+    sent = st.session_state.setdefault("geometry_sent", {}).setdefault(key, set())
+    with recorder.stage("figure", detail=key) as rec:
+        rec["cache"] = "hit" if geometry_id in sent else "miss"
+        values = {"locations": df[locations].tolist(), "z": df["total_amount"].tolist(),
+                  "hovertext": df[hover_name].tolist(), "customdata": df[["total_count"]].to_numpy().tolist()}
+        base = None if geometry_id in sent else choropleth_base(layer, zoom, state, fingerprint)
+        reply = choropleth_component()(geometry=geometry_id, base=base, values=values, title=title,
+                                       height=CHOROPLETH_HEIGHT, key=key, default=None)
+    sent.add(geometry_id)
+    # A remounted frame has lost what it was sent; it asks once per remount and gets the base again
+    if reply and reply.get("request") != st.session_state.get(f"{key}_request"):
+        st.session_state[f"{key}_request"] = reply["request"]
+        sent.clear()
+        st.rerun()
+
+def not_on_map(names, reason):
+    if len(names):
+        st.caption(f"⚠️ Not on the map ({reason}): {', '.join(sorted(names))}")
+
+@st.fragment
+@timed_view("state_map")
+def render_state_map(selected_year, selected_quarter):
     st.subheader("🗺️ State-Level Transaction Map")
 
-    df_map_f = apply_year_quarter_filters(hover_df, selected_year, selected_quarter)
+    map_by_state = aggregate("map_hover_transactions", ["state"], selected_year, selected_quarter)
 
-    if df_map_f.empty:
+    if map_by_state.empty:
         st.warning("No transaction data available for the selected filters.")
+        return
+
+    # State names are already canonical; centroids come from the dimension table in one join.
+    # Unknown names stay in the breakdown below and are listed under the map.
+    state_agg = (
+        map_by_state.rename(columns={"state": "state_norm", "amount": "total_amount", "count": "total_count"})
+                .merge(dimensions.STATE_FRAME[["state", "lat", "lon"]],
+                       left_on="state_norm", right_on="state", how="left")
+                .drop(columns="state")
+    )
+    title = ("Transactions by State – "
+             f"{selected_quarter}, {selected_year}" if selected_year!="All" or selected_quarter!="All"
+             else "Transactions by State – All Data")
+
+    state_geo = boundaries("state", MAP_ZOOM)
+    if state_geo is not None:
+        placed = state_agg["state_norm"].isin(geometry.region_ids(state_geo))
+        reason = "no boundary"
     else:
-        label_col = "state" if "state" in df_map_f.columns else "district"
-        df_map_f["state_norm"] = df_map_f[label_col].astype(str).apply(norm_state)
-        df_map_f["amount"] = pd.to_numeric(df_map_f.get("amount"), errors="coerce").fillna(0)
-        df_map_f["count"]  = pd.to_numeric(df_map_f.get("count"), errors="coerce").fillna(0)
-
-        state_agg = (
-            df_map_f.groupby("state_norm", as_index=False)
-                    .agg(total_amount=("amount", "sum"),
-                         total_count=("count", "sum"))
-        )
-        state_agg["lat"] = state_agg["state_norm"].map(lambda s: STATE_CENTROIDS.get(s, (None, None))[0])
-        state_agg["lon"] = state_agg["state_norm"].map(lambda s: STATE_CENTROIDS.get(s, (None, None))[1])
-        state_agg = state_agg.dropna(subset=["lat", "lon"])
+        placed = state_agg["lat"].notna()
+        reason = "no centroid"
 
-        if state_agg.empty:
-            st.warning("Could not place states on the map (name mismatch).")
+    if not placed.any():
+        st.warning("Could not place states on the map (name mismatch).")
+    elif state_geo is not None:
+        choropleth("state_choropleth", "state", MAP_ZOOM, state_agg[placed], "state_norm", "state_norm", title)
+    else:
+        fig_map = cached_figure("state_map", selected_year, selected_quarter, lambda: px.scatter_mapbox(
+            state_agg[placed],
+            lat="lat", lon="lon",
+            size="total_amount",
+            color="total_amount",
+            hover_name="state_norm",
+            hover_data={"total_amount": ":,", "total_count": ":,d", "lat": False, "lon": False},
+            size_max=40,
+            zoom=3.9,
+            center={"lat": 22.9734, "lon": 78.6569},
+            mapbox_style="open-street-map",
+            title=title,
+            color_continuous_scale="Viridis"
+        ).update_layout(margin=dict(l=0, r=0, t=60, b=0)))
+        st.plotly_chart(fig_map, use_container_width=True)
+    not_on_map(state_agg.loc[~placed, "state_norm"], reason)
+
+    # -------- New Breakdown Section --------
+    st.markdown("### 📊 State Transaction Breakdown")
+    chart_type = st.radio("Select view:", ["Bar Chart", "Pie Chart", "Table"], horizontal=True)
+
+    if chart_type == "Bar Chart":
+        fig_bar = cached_figure("state_bar", selected_year, selected_quarter, lambda: px.bar(
+            state_agg.sort_values("total_amount", ascending=False),
+            x="state_norm", y="total_amount",
+            hover_data=["total_count"],
+            color="total_amount", color_continuous_scale="Blues",
+            title="Transaction Amount by State"
+        ), view=chart_type)
+        st.plotly_chart(fig_bar, use_container_width=True)
+
+    elif chart_type == "Pie Chart":
+        fig_pie = cached_figure("state_pie", selected_year, selected_quarter, lambda: px.pie(
+            state_agg, names="state_norm", values="total_amount",
+            title="Transaction Share by State"
+        ), view=chart_type)
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    else:
+        st.dataframe(state_agg.sort_values("total_amount", ascending=False), use_container_width=True)
+    growth_panel("map_hover_transactions", "amount", "Transaction amount", selected_year, selected_quarter)
+
+    # -------- District Drill-down --------
+    # District tables are partitioned by state, so this reads only the chosen state's rows
+    if snapshot.backend.available("map_transaction"):
+        st.markdown("### 🏙️ District Drill-down")
+        drill_state = st.selectbox("Select state:", state_agg.sort_values("total_amount", ascending=False)["state_norm"],
+                                   key="drill_state")
+        districts = aggregate("map_transaction", ["district"], selected_year, selected_quarter,
+                              where={"state": drill_state})
+        if districts.empty:
+            st.info(f"No district data for {drill_state} in the selected period.")
         else:
-            fig_map = px.scatter_mapbox(
-                state_agg,
-                lat="lat", lon="lon",
-                size="total_amount",
-                color="total_amount",
-                hover_name="state_norm",
-                hover_data={"total_amount": ":,", "total_count": ":,d", "lat": False, "lon": False},
-                size_max=40,
-                zoom=3.9,
-                center={"lat": 22.9734, "lon": 78.6569},
-                mapbox_style="open-street-map",
-                title=("Transactions by State – "
-                       f"{selected_quarter}, {selected_year}" if selected_year!="All" or selected_quarter!="All"
-                       else "Transactions by State – All Data"),
-                color_continuous_scale="Viridis"
+            district_summary = (
+                districts.rename(columns={"amount": "total_amount", "count": "total_count"})
+                         .sort_values("total_amount", ascending=False)
             )
-            fig_map.update_layout(margin=dict(l=0, r=0, t=60, b=0))
-            st.plotly_chart(fig_map, use_container_width=True)
-
-            # -------- New Breakdown Section --------
-            st.markdown("### 📊 State Transaction Breakdown")
-            chart_type = st.radio("Select view:", ["Bar Chart", "Pie Chart", "Table"], horizontal=True)
-
-            if chart_type == "Bar Chart":
-                fig_bar = px.bar(
-                    state_agg.sort_values("total_amount", ascending=False),
-                    x="state_norm", y="total_amount",
-                    hover_data=["total_count"],
-                    color="total_amount", color_continuous_scale="Blues",
-                    title="Transaction Amount by State"
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
-
-            elif chart_type == "Pie Chart":
-                fig_pie = px.pie(
-                    state_agg, names="state_norm", values="total_amount",
-                    title="Transaction Share by State"
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
-
+            fig_district = cached_figure("district_bar", selected_year, selected_quarter, lambda: px.bar(
+                district_summary,
+                x="district", y="total_amount",
+                hover_data=["total_count"],
+                color="total_amount", color_continuous_scale="Blues",
+                title=f"Transaction Amount by District – {drill_state}"
+            ), view=drill_state)
+
+            district_geo = boundaries("district", DISTRICT_ZOOM, drill_state)
+            if not district_geo or not district_geo["features"]:
+                st.plotly_chart(fig_district, use_container_width=True)
             else:
-                st.dataframe(state_agg.sort_values("total_amount", ascending=False), use_container_width=True)
+                district_summary = district_summary.assign(
+                    region=[geometry.region_id(drill_state, d) for d in district_summary["district"]])
+                placed = district_summary["region"].isin(geometry.region_ids(district_geo))
+                col_map, col_bar = st.columns(2)
+                with col_map:
+                    if placed.any():
+                        choropleth("district_choropleth", "district", DISTRICT_ZOOM, district_summary[placed],
+                                   "region", "district", f"Districts – {drill_state}", state=drill_state)
+                    not_on_map(district_summary.loc[~placed, "district"], "no boundary")
+                with col_bar:
+                    st.plotly_chart(fig_district, use_container_width=True)
 
 # ---------------------- 3) Transaction Categories ----------------------
-with tab3:
+@st.fragment
+@timed_view("categories")
+def render_categories(selected_year, selected_quarter):
     st.subheader("📂 Transaction Categories")
 
-    df_cat_f = apply_year_quarter_filters(category_df, selected_year, selected_quarter)
+    cat_by_name = aggregate("transaction_categories", ["category"], selected_year, selected_quarter)
 
-    if df_cat_f.empty:
+    if cat_by_name.empty:
         st.warning("No category data available for the selected filters.")
     else:
-        df_cat_f["amount"] = pd.to_numeric(df_cat_f.get("amount"), errors="coerce").fillna(0)
         cat_summary = (
-            df_cat_f.groupby("category", dropna=False, as_index=False)
-                    .agg(total_amount=("amount", "sum"))
+            cat_by_name[["category", "amount"]]
+                    .rename(columns={"amount": "total_amount"})
                     .sort_values("total_amount", ascending=False)
         )
         st.dataframe(cat_summary, use_container_width=True)
 
-        fig3 = px.bar(
+        fig3 = cached_figure("category_bar", selected_year, selected_quarter, lambda: px.bar(
             cat_summary,
             x="category", y="total_amount",
             color="category",
@@ -291,44 +430,52 @@ with tab3:
                    f"{selected_quarter}, {selected_year}" if selected_year!="All" or selected_quarter!="All"
                    else "Amount by Category – All Data"),
             labels={"total_amount": "Amount"}
-        )
+        ))
         st.plotly_chart(fig3, use_container_width=True)
+        growth_panel("transaction_categories", "amount", "Amount", selected_year, selected_quarter)
 
 # ---------------------- 4) Device Usage ----------------------
-with tab4:
+@st.fragment
+@timed_view("devices")
+def render_devices(selected_year, selected_quarter):
     st.subheader("📱 Device Usage")
 
-    df_dev_f = apply_year_quarter_filters(device_df, selected_year, selected_quarter)
+    dev_by_brand = aggregate("user_device_data", ["brand"], selected_year, selected_quarter)
 
-    if df_dev_f.empty:
+    if dev_by_brand.empty:
         st.warning("No device data.")
     else:
-        df_dev_f["count"] = pd.to_numeric(df_dev_f.get("count"), errors="coerce").fillna(0)
-        brand_summary = (
-            df_dev_f.groupby("brand", dropna=False, as_index=False)
-                    .agg(total_users=("count", "sum"))
-                    .sort_values("total_users", ascending=False)
+        brand_summary = query_layer.with_share(
+            dev_by_brand[["brand", "count"]]
+                    .rename(columns={"count": "total_users"})
+                    .sort_values("total_users", ascending=False),
+            "total_users",
         )
 
         st.dataframe(brand_summary, use_container_width=True)
 
-        fig4 = px.pie(
+        fig4 = cached_figure("device_pie", selected_year, selected_quarter, lambda: px.pie(
             brand_summary, names="brand", values="total_users",
             title=("Device Brand Distribution – "
                    f"{selected_quarter}, {selected_year}" if selected_year!="All" or selected_quarter!="All"
                    else "Device Brand Distribution – All Data"),
             hole=0.35
-        )
+        ))
         st.plotly_chart(fig4, use_container_width=True)
+        growth_panel("user_device_data", "count", "Users", selected_year, selected_quarter)
 
 # ---------------------- 5) Summary Insights ----------------------
-with tab5:
+@st.fragment
+@timed_view("summary")
+def render_summary(selected_year, selected_quarter):
     st.subheader("📊 Summary Insights")
 
-    ins_all_val = pd.to_numeric(insurance_df.get("amount"), errors="coerce").fillna(0).sum() if not insurance_df.empty else 0
-    ins_all_cnt = pd.to_numeric(insurance_df.get("count"), errors="coerce").fillna(0).sum() if not insurance_df.empty else 0
-    hov_all_amt = pd.to_numeric(hover_df.get("amount"), errors="coerce").fillna(0).sum() if not hover_df.empty else 0
-    hov_all_cnt = pd.to_numeric(hover_df.get("count"), errors="coerce").fillna(0).sum() if not hover_df.empty else 0
+    ins_totals = aggregate("insurance_data")
+    hov_totals = aggregate("map_hover_transactions")
+    ins_all_val = ins_totals["amount"].sum()
+    ins_all_cnt = ins_totals["count"].sum()
+    hov_all_amt = hov_totals["amount"].sum()
+    hov_all_cnt = hov_totals["count"].sum()
 
     k1, k2, k3, k4 = st.columns(4)
     k1.metric("💳 Total Transaction Amount", f"₹{hov_all_amt:,.0f}")
@@ -336,67 +483,143 @@ with tab5:
     k3.metric("🛡️ Total Insurance Value", f"₹{ins_all_val:,.0f}")
     k4.metric("📑 Total Policies", f"{int(ins_all_cnt):,}")
 
+    st.markdown("#### 📈 Growth")
+    growth_kpis("map_hover_transactions", "amount", "Transaction amount", selected_year, selected_quarter)
+    growth_kpis("insurance_data", "amount", "Insurance value", selected_year, selected_quarter)
+
     st.markdown("---")
 
-    ins = insurance_df.copy()
+    ins = aggregate("insurance_data", ["year", "quarter"])
     if not ins.empty:
-        ins["year"] = pd.to_numeric(ins.get("year"), errors="coerce")
-        ins["quarter"] = ins.get("quarter").astype(str).str.extract(r"(\d+)", expand=False).astype(float)
-        ins = ins.dropna(subset=["year", "quarter"])
-        ins["year"] = ins["year"].astype(int)
-        ins["quarter"] = ins["quarter"].astype(int)
-
         ins_summary = (
-            ins.groupby(["year", "quarter"], as_index=False)
-               .agg(total_insured=("count","sum"), total_value=("amount","sum"))
+            ins.rename(columns={"count": "total_insured", "amount": "total_value"})
                .sort_values(["year","quarter"])
         )
         c1, c2 = st.columns(2)
         with c1:
-            fig5 = px.line(
+            fig5 = cached_figure("summary_policies", "All", "All", lambda: px.line(
                 ins_summary, x="year", y="total_insured",
                 color=ins_summary["quarter"].astype(str),
                 title="Total Policies Over Time", markers=True, labels={"color":"Quarter"}
-            )
+            ))
             st.plotly_chart(fig5, use_container_width=True)
         with c2:
-            fig5b = px.line(
+            fig5b = cached_figure("summary_insurance_value", "All", "All", lambda: px.line(
                 ins_summary, x="year", y="total_value",
                 color=ins_summary["quarter"].astype(str),
                 title="Total Insurance Value Over Time", markers=True, labels={"color":"Quarter"}
-            )
+            ))
             st.plotly_chart(fig5b, use_container_width=True)
 
-    hov = hover_df.copy()
+    hov = aggregate("map_hover_transactions", ["year", "quarter"])
     if not hov.empty:
-        hov["year"] = pd.to_numeric(hov.get("year"), errors="coerce")
-        hov["quarter"] = hov.get("quarter").astype(str).str.extract(r"(\d+)", expand=False).astype(float)
-        hov = hov.dropna(subset=["year", "quarter"])
-        hov["year"] = hov["year"].astype(int)
-        hov["quarter"] = hov["quarter"].astype(int)
-
         hov_summary = (
-            hov.groupby(["year", "quarter"], as_index=False)
-               .agg(total_txn=("count","sum"), total_amount=("amount","sum"))
+            hov.rename(columns={"count": "total_txn", "amount": "total_amount"})
                .sort_values(["year","quarter"])
         )
         c3, c4 = st.columns(2)
         with c3:
-            fig6 = px.line(
+            fig6 = cached_figure("summary_txn_count", "All", "All", lambda: px.line(
                 hov_summary, x="year", y="total_txn",
                 color=hov_summary["quarter"].astype(str),
                 title="Total Transactions Over Time", markers=True, labels={"color":"Quarter"}
-            )
+            ))
             st.plotly_chart(fig6, use_container_width=True)
         with c4:
-            fig6b = px.line(
+            fig6b = cached_figure("summary_txn_amount", "All", "All", lambda: px.line(
                 hov_summary, x="year", y="total_amount",
                 color=hov_summary["quarter"].astype(str),
                 title="Total Transaction Amount Over Time", markers=True, labels={"color":"Quarter"}
-            )
+            ))
             st.plotly_chart(fig6b, use_container_width=True)
 
+# ---------------------- 6) Top 10 ----------------------
+# Served from the snapshot's rankings: the unfiltered top 10 of each level is precomputed per
+# year/quarter, and a single state's districts or pincodes are selected exactly on demand.
+RANK_BY = {
+    "Transaction amount": ("top_transaction", "amount"),
+    "Transaction count": ("top_transaction", "count"),
+    "Registered users": ("top_user", "registered_users"),
+    "Insurance amount": ("top_insurance", "amount"),
+    "Insurance policies": ("top_insurance", "count"),
+}
+RANK_LEVELS = {"States": "state", "Districts": "district", "Pincodes": "pincode"}
+
+@st.fragment
+@timed_view("top10")
+def render_top10(selected_year, selected_quarter):
+    st.subheader("🏆 Top 10")
+    ranks = snapshot.rankings
+    options = [label for label, (table, _) in RANK_BY.items() if table in ranks.tables()]
+    c1, c2, c3 = st.columns(3)
+    rank_by = c1.selectbox("Rank by:", options, key="rank_by")
+    table, metric = RANK_BY[rank_by]
+    levels = [label for label, level in RANK_LEVELS.items() if level in ranks.levels(table)]
+    level_label = c2.radio("Level:", levels, horizontal=True, key="rank_level")
+    level = RANK_LEVELS[level_label]
+    scope = "India"
+    if level != "state":
+        scope = c3.selectbox("Within:", ["India"] + ranks.scopes(table, level), key="rank_scope")
+
+    with recorder.stage("rankings", detail=f"{table}[{level},{metric}]") as rec:
+        top = ranks.top(table, level, metric, 10, selected_year, selected_quarter, scope)
+        rec["rows"] = len(top)
+    if top.empty:
+        st.warning("No ranking data for the selected filters.")
+        return
+
+    label = top["entity"] if level == "state" or scope != "India" else top["entity"] + " (" + top["state"] + ")"
+    top = top.assign(label=label)
+    fig_top = cached_figure("top10_bar", selected_year, selected_quarter, lambda: px.bar(
+        top, x="label", y=metric,
+        color=metric, color_continuous_scale="Blues",
+        title=f"Top 10 {level_label} by {rank_by} – {scope}",
+        labels={"label": level_label[:-1], metric: rank_by}
+    ), view=(rank_by, level, scope))
+    st.plotly_chart(fig_top, use_container_width=True)
+    st.dataframe(top.drop(columns="label"), use_container_width=True, hide_index=True)
+
+# ---------------------- Render ----------------------
+VIEWS = {
+    "🛡️ Insurance Summary": render_insurance,
+    "🗺️ State-Level Transaction Map": render_state_map,
+    "📂 Transaction Categories": render_categories,
+    "📱 Device Usage": render_devices,
+    "📊 Summary Insights": render_summary,
+}
+if snapshot.rankings is not None:
+    VIEWS["🏆 Top 10"] = render_top10
+
+if LAZY_TABS:
+    active_view = st.radio("View", list(VIEWS), horizontal=True, key="active_view", label_visibility="collapsed")
+    VIEWS[active_view](selected_year, selected_quarter)
+else:
+    for tab, render_view in zip(st.tabs(list(VIEWS)), VIEWS.values()):
+        with tab:
+            render_view(selected_year, selected_quarter)
+
 # ---------------------- Footer ----------------------
 st.markdown("---")
-st.markdown("📌 Built by Gokul | Powered by Streamlit & MySQL")
+st.markdown(f"📌 Built by Gokul | Powered by Streamlit & {snapshot.backend.name.capitalize()}")
+
+# ---------------------- Debug panel ----------------------
+profile_report = rerun_profile.stop() if rerun_profile is not None else None
+recorder.finish()
+if DEBUG:
+    with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+        timings = recorder.frame()
+        st.caption(f"Data version {snapshot.version} · backend {snapshot.backend.name} · "
+                   f"{(timings[timings['stage'] == 'view']['ms'].sum()):,.1f} ms in views")
+        st.dataframe(timings, use_container_width=True, hide_index=True)
+        caches = {"figures": get_figure_cache().stats()}
+        if get_store().result_cache is not None:
+            caches["results (disk)"] = get_store().result_cache.stats()
+        st.json(caches, expanded=False)
+        if st.button("Profile next rerun"):
+            st.session_state["profile_next"] = True
+            st.rerun()
+        if profile_report is not None:
+            text, raw = profile_report
+            st.code(text, language=None)
+            st.download_button("Download .prof", raw, file_name="rerun.prof")
 
@@ -0,0 +1,161 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+log = logging.getLogger("pulse.timings")
+
+# 🩺 PULSE_DEBUG=1 (or ?debug=1) shows the sidebar panel; PULSE_TIMING_LOG=1 logs one JSON line per
+# rerun to stderr; PULSE_METRICS_PORT=9108 serves Prometheus text at http://host:9108/metrics
+DEBUG_ENV = "PULSE_DEBUG"
+LOG_ENV = "PULSE_TIMING_LOG"
+METRICS_PORT_ENV = "PULSE_METRICS_PORT"
+
+
+class RerunRecorder:
+    """Wall time, rows and cache outcome of every stage in one script run (or fragment rerun).
+
+    Stages nest; a stage inherits the ``tab`` of the stage it runs inside. Once :meth:`finish`
+    has run, a new outermost stage (a fragment rerunning on its own) is reported by itself.
+    """
+
+    def __init__(self, on_finish=None):
+        self.on_finish = on_finish
+        self.started = time.perf_counter()
+        self.records = []
+        self.finished = False
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name, tab=None, detail=None):
+        parent = self._stack[-1] if self._stack else None
+        record = {"stage": name, "tab": tab or (parent["tab"] if parent else None), "detail": detail,
+                  "ms": 0.0, "rows": None, "cache": None}
+        if self.finished and parent is None:
+            self.records = []
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._stack.pop()
+            self.records.append(record)
+            if self.finished and not self._stack:
+                self._emit("fragment", record["ms"])
+
+    def note(self, **fields):
+        """Update the innermost open stage (e.g. ``cache="miss"`` from inside a cached function)."""
+        if self._stack:
+            self._stack[-1].update(fields)
+
+    def finish(self):
+        self.finished = True
+        self._emit("script", round((time.perf_counter() - self.started) * 1000, 3))
+
+    def _emit(self, kind, total_ms):
+        if self.on_finish is not None:
+            self.on_finish(kind, total_ms, list(self.records))
+
+    def frame(self):
+        return pd.DataFrame(self.records, columns=["stage", "tab", "detail", "ms", "rows", "cache"])
+
+
+class Metrics:
+    """Process-wide totals per (stage, tab, cache) for scraping, fed by every session's reruns."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._reruns = {}
+
+    def observe(self, kind, total_ms, records):
+        with self._lock:
+            count, total = self._reruns.get(kind, (0, 0.0))
+            self._reruns[kind] = (count + 1, total + total_ms)
+            for r in records:
+                key = (r["stage"], r["tab"] or "", r["cache"] or "")
+                count, total, rows = self._stages.get(key, (0, 0.0, 0))
+                self._stages[key] = (count + 1, total + r["ms"], rows + (r["rows"] or 0))
+
+    def prometheus(self):
+        lines = ["# TYPE pulse_rerun_seconds summary"]
+        with self._lock:
+            for kind, (count, total) in sorted(self._reruns.items()):
+                lines.append(f'pulse_rerun_seconds_count{{kind="{kind}"}} {count}')
+                lines.append(f'pulse_rerun_seconds_sum{{kind="{kind}"}} {total / 1000:.6f}')
+            lines.append("# TYPE pulse_stage_seconds summary")
+            for (stage, tab, cache), (count, total, _) in sorted(self._stages.items()):
+                labels = f'stage="{stage}",tab="{tab}",cache="{cache}"'
+                lines.append(f"pulse_stage_seconds_count{{{labels}}} {count}")
+                lines.append(f"pulse_stage_seconds_sum{{{labels}}} {total / 1000:.6f}")
+            lines.append("# TYPE pulse_stage_rows_total counter")
+            for (stage, tab, cache), (_, _, rows) in sorted(self._stages.items()):
+                lines.append(f'pulse_stage_rows_total{{stage="{stage}",tab="{tab}",cache="{cache}"}} {rows}')
+        return "\n".join(lines) + "\n"
+
+
+def log_rerun(kind, total_ms, records, **context):
+    log.info(json.dumps({"event": "rerun", "kind": kind, "total_ms": total_ms, **context, "stages": records},
+                        default=str))
+
+
+def configure_logging():
+    """Send the per-rerun JSON lines to stderr when PULSE_TIMING_LOG=1 (idempotent)."""
+    if os.environ.get(LOG_ENV) == "1" and not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+
+
+def serve_metrics(metrics, port):
+    """Serve ``metrics`` at /metrics from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="pulse-metrics", daemon=True).start()
+    return server
+
+
+class RerunProfile:
+    """cProfile capture of one script run: top functions as text plus the raw .prof bytes."""
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop(self, limit=30):
+        self._profiler.disable()
+        text = io.StringIO()
+        pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(limit)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rerun.prof")
+            self._profiler.dump_stats(path)
+            with open(path, "rb") as f:
+                raw = f.read()
+        return text.getvalue(), raw
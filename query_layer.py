@@ -0,0 +1,109 @@
+import pandas as pd
+
+# 🧱 Per table: logical dimension -> physical column, and the summable measures.
+# map_hover_transactions keeps state names in its `district` column; the map_* district tables have
+# real state and district columns and are partitioned by state inside each (year, quarter).
+TABLES = {
+    "insurance_data": {"dims": {"state": "state", "level": "level", "type": "type"},
+                       "measures": ["count", "amount"]},
+    "map_hover_transactions": {"dims": {"state": "district"}, "measures": ["count", "amount"]},
+    "transaction_categories": {"dims": {"category": "category"}, "measures": ["count", "amount"]},
+    "user_device_data": {"dims": {"brand": "brand"}, "measures": ["count"]},
+    "map_transaction": {"dims": {"state": "state", "district": "district"}, "measures": ["count", "amount"],
+                        "partition": "state"},
+    "map_user": {"dims": {"state": "state", "district": "district"},
+                 "measures": ["registered_users", "app_opens"], "partition": "state"},
+    "map_insurance": {"dims": {"state": "state", "district": "district", "type": "insurance_type"},
+                      "measures": ["count", "amount"], "partition": "state"},
+}
+TIME_DIMS = ("year", "quarter")
+# Rows every total is computed over. insurance_data repeats each quarter as a "Country" row next to
+# the state rows, so the cube, the tabs, the API and the growth matrices all sum the states only.
+BASIS = {"insurance_data": {"level": "State"}}
+
+
+def quarter_number(q_label):
+    """"Q2" / "2" / 2 -> 2; "All" -> None."""
+    if q_label in (None, "All"):
+        return None
+    return int(str(q_label).upper().replace("Q", "").strip())
+
+
+def with_basis(table, where=None):
+    """``where`` plus the table's :data:`BASIS` filter (an explicit filter on the same dimension wins)."""
+    return {**BASIS.get(table, {}), **(where or {})} or None
+
+
+def _column(table, dim):
+    if dim in TIME_DIMS:
+        return dim
+    try:
+        return TABLES[table]["dims"][dim]
+    except KeyError:
+        raise ValueError(f"{table} has no dimension {dim!r}") from None
+
+
+def build_aggregate(table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+    """Parameterized ``SELECT by..., SUM(measures) ... WHERE year/quarter GROUP BY by``.
+
+    Placeholders are ``?`` (qmark); ``where`` is ``{dim: value}`` equality filters, or
+    ``{dim: (values...)}`` for ``IN`` lists.
+    Returns ``(sql, params)``.
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r}")
+    select = [f"{_column(table, dim)} AS {dim}" for dim in by]
+    select += [f"SUM({m}) AS {m}" for m in TABLES[table]["measures"]]
+
+    clauses, params = [], []
+    if year != "All":
+        clauses.append("year = ?")
+        params.append(int(year))
+    if quarter_number(quarter) is not None:
+        clauses.append("quarter = ?")
+        params.append(quarter_number(quarter))
+    for dim, value in (where or {}).items():
+        if isinstance(value, (list, tuple)):
+            clauses.append(f"{_column(table, dim)} IN ({', '.join(['?'] * len(value))})")
+            params.extend(value)
+        else:
+            clauses.append(f"{_column(table, dim)} = ?")
+            params.append(value)
+
+    sql = f"SELECT {', '.join(select)} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if by:
+        sql += " GROUP BY " + ", ".join(_column(table, dim) for dim in by)
+    if order_by:
+        sql += " ORDER BY " + ", ".join(f"{col} DESC" if desc else col for col, desc in order_terms(order_by))
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def order_terms(order_by):
+    """"-amount" sorts descending."""
+    for col in ([order_by] if isinstance(order_by, str) else order_by):
+        yield (col[1:], True) if col.startswith("-") else (col, False)
+
+
+def to_format_style(sql):
+    """qmark -> format placeholders for mysql.connector."""
+    return sql.replace("?", "%s")
+
+
+def fetch_mysql(conn, sql, params):
+    cursor = conn.cursor()
+    cursor.execute(to_format_style(sql), tuple(params))
+    columns = [c[0] for c in cursor.description]
+    rows = cursor.fetchall()
+    cursor.close()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def with_share(df, measure, name="share_pct"):
+    """Percentage of the column total, derived on demand instead of stored per row."""
+    total = df[measure].sum()
+    return df.assign(**{name: (df[measure] / total * 100).round(2) if total else 0.0})
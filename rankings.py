@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+import memory_store
+import query_layer
+
+ALL = "All"
+
+# 🏆 Top-N over the ingested top/ lists. A top-K per (year, quarter, level, metric) is computed once
+# per data version; any other request (a state's districts, N > K) is answered exactly by summing
+# per entity with np.bincount and keeping the N largest with np.argpartition, never a full sort.
+RANK_TABLES = {
+    "top_transaction": ["amount", "count"],
+    "top_user": ["registered_users"],
+    "top_insurance": ["amount", "count"],
+}
+LEVELS = ("state", "district", "pincode")
+DEFAULT_K = 10
+
+
+def top_n(values, n):
+    """Positions of the ``n`` largest ``values``, largest first: O(len) selection, then sort only ``n``."""
+    values = np.asarray(values)
+    if n <= 0 or len(values) == 0:
+        return np.empty(0, dtype=np.intp)
+    if n < len(values):
+        picked = np.argpartition(-values, n - 1)[:n]
+    else:
+        picked = np.arange(len(values))
+    return picked[np.argsort(-values[picked], kind="stable")]
+
+
+def top_rows(df, column, n):
+    """``df.sort_values(column, ascending=False).head(n)`` without sorting every row."""
+    return df.iloc[top_n(df[column].to_numpy(), n)]
+
+
+class LevelRanks:
+    """One level (state/district/pincode) of one top_* table as arrays, entities numbered 0..E-1.
+
+    States are identified by name; districts and pincodes by (state, name), as their files are per state.
+    """
+
+    def __init__(self, df, level, measures, k):
+        self.level = level
+        self.measures = measures
+        self.k = k
+        identity = ["entity"] if level == "state" else ["scope", "entity"]
+        codes = df.groupby(identity, sort=False).ngroup().to_numpy()
+        first = df.drop_duplicates(identity)
+        self.names = first["entity"].to_numpy()
+        self.states = first["entity" if level == "state" else "scope"].to_numpy()
+        self.entity = codes
+        self.scope_codes, self.scopes = pd.factorize(df["scope"])
+        self.year = df["year"].to_numpy()
+        self.quarter = df["quarter"].to_numpy()
+        self.values = {m: df[m].to_numpy(np.float64) for m in measures}
+        self.years = sorted(set(self.year.tolist()))
+        self._top = {}
+        for year in [ALL] + self.years:
+            for quarter in (ALL, 1, 2, 3, 4):
+                sums, present = self._sums(self._mask(year, quarter))
+                if not present.any():
+                    continue
+                candidates = np.flatnonzero(present)
+                for metric in measures:
+                    picked = candidates[top_n(sums[metric][candidates], k)]
+                    self._top[(year, quarter, metric)] = (picked, {m: sums[m][picked] for m in measures})
+
+    def _mask(self, year, quarter, scope=None):
+        mask = np.ones(len(self.entity), dtype=bool)
+        if year != ALL:
+            mask &= self.year == year
+        if quarter != ALL:
+            mask &= self.quarter == quarter
+        if scope is not None:
+            code = self.scopes.get_indexer([scope])[0]
+            mask &= self.scope_codes == code
+        return mask
+
+    def _sums(self, mask):
+        entity = self.entity[mask]
+        size = len(self.names)
+        sums = {m: np.bincount(entity, weights=v[mask], minlength=size) for m, v in self.values.items()}
+        return sums, np.bincount(entity, minlength=size) > 0
+
+    def top(self, metric, n, year=ALL, quarter=ALL, scope=None):
+        cached = self._top.get((year, quarter, metric)) if scope is None and n <= self.k else None
+        if cached is not None:
+            picked, sums = cached
+            picked, sums = picked[:n], {m: s[:n] for m, s in sums.items()}
+        else:
+            all_sums, present = self._sums(self._mask(year, quarter, scope))
+            candidates = np.flatnonzero(present)
+            picked = candidates[top_n(all_sums[metric][candidates], n)]
+            sums = {m: s[picked] for m, s in all_sums.items()}
+        out = pd.DataFrame({"rank": np.arange(1, len(picked) + 1), "entity": self.names[picked],
+                            "state": self.states[picked]})
+        for m in self.measures:
+            out[m] = sums[m] if m == "amount" else sums[m].astype(np.int64)
+        return out
+
+
+class Rankings:
+    """Top-N lookups for every available top_* table: ``top(table, level, metric, n, year, quarter, scope)``."""
+
+    def __init__(self, frames, k=DEFAULT_K):
+        self.k = k
+        self._levels = {}
+        for table, df in frames.items():
+            df = memory_store.normalize_time(df)
+            df = df.assign(scope=df["scope"].astype(str), level=df["level"].astype(str),
+                           entity=df["entity"].astype(str))
+            for level, part in df.groupby("level", sort=False):
+                if level in LEVELS:
+                    self._levels[(table, level)] = LevelRanks(part.reset_index(drop=True), level,
+                                                              RANK_TABLES[table], k)
+
+    def tables(self):
+        return sorted({table for table, _ in self._levels})
+
+    def levels(self, table):
+        return [level for level in LEVELS if (table, level) in self._levels]
+
+    def scopes(self, table, level):
+        """States whose own files rank this level (for district/pincode filters)."""
+        ranks = self._levels.get((table, level))
+        return sorted(ranks.scopes) if ranks is not None and level != "state" else []
+
+    def top(self, table, level, metric, n=DEFAULT_K, year=ALL, quarter=ALL, scope=None):
+        """Top ``n`` entities of ``level`` by summed ``metric``: columns rank, entity, state, measures.
+
+        ``scope`` limits district and pincode rankings to one state; state rankings ignore it.
+        """
+        ranks = self._levels.get((table, level))
+        if ranks is None:
+            return pd.DataFrame(columns=["rank", "entity", "state"] + RANK_TABLES.get(table, []))
+        if metric not in ranks.measures:
+            raise ValueError(f"{table} has no measure {metric!r}")
+        q = query_layer.quarter_number(quarter)
+        return ranks.top(metric, int(n), ALL if year == ALL else int(year), ALL if q is None else q,
+                         None if scope in (None, ALL, "India") or level == "state" else scope)
+
+
+def load_rankings(data_dir, k=DEFAULT_K):
+    """Rankings over whichever top_* tables ingestion produced, or None when there are none."""
+    frames = {t: memory_store.load_table(data_dir, t) for t in RANK_TABLES if memory_store.available(data_dir, t)}
+    frames = {t: df for t, df in frames.items() if len(df)}
+    return Rankings(frames, k) if frames else None
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from ingest import DEFAULT_OUTPUT
+
+    parser = argparse.ArgumentParser(description="Print a top-N ranking from the ingested top/ data.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--table", default="top_transaction", choices=sorted(RANK_TABLES))
+    parser.add_argument("--level", default="pincode", choices=LEVELS)
+    parser.add_argument("--metric", help="measure to rank by (default: the table's first)")
+    parser.add_argument("-n", type=int, default=DEFAULT_K)
+    parser.add_argument("--year", default=ALL)
+    parser.add_argument("--quarter", default=ALL)
+    parser.add_argument("--state", help="only this state's districts/pincodes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    ranks = load_rankings(args.output)
+    if ranks is None:
+        raise SystemExit(f"❌ No top_* tables under {args.output}; run ingest.py first")
+    built = time.perf_counter()
+    out = ranks.top(args.table, args.level, args.metric or RANK_TABLES[args.table][0], args.n,
+                    args.year, args.quarter, args.state)
+    print(out.to_string(index=False))
+    print(f"⏱️ built in {(built - start) * 1000:.1f} ms, answered in {(time.perf_counter() - built) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import query_layer
+from ingest import DEFAULT_OUTPUT
+
+# 💾 Aggregate results kept on disk across restarts, keyed by normalized query + data version
+CACHE_ENV = "PULSE_RESULT_CACHE"
+CACHE_SIZE_ENV = "PULSE_RESULT_CACHE_MB"
+CACHE_FILE = "query_cache.sqlite"
+DEFAULT_MAX_MB = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (version, query)
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used);
+"""
+
+
+def normalize_query(table, by=(), year="All", quarter="All", where=None, order_by=None, limit=None):
+    """Canonical text for one aggregate request: "Q2", "2" and 2 are the same quarter."""
+    q = query_layer.quarter_number(quarter)
+    return json.dumps({
+        "table": table,
+        "by": list(by),
+        "year": "All" if year == "All" else int(year),
+        "quarter": "All" if q is None else q,
+        "where": sorted((str(k), str(v)) for k, v in (where or {}).items()),
+        "order_by": [order_by] if isinstance(order_by, str) else list(order_by or []),
+        "limit": int(limit) if limit else None,
+    }, sort_keys=True)
+
+
+def reads_partitions(query, changes):
+    """Whether a cached entry may read any changed (year, quarter) partition.
+
+    ``query`` is a :func:`normalize_query` text or a figure key (``["figure", id, year, quarter, view]``,
+    which does not name its tables); ``changes`` is ``{table: [[year, quarter], ...] or None}``.
+    """
+    key = json.loads(query)
+    if isinstance(key, dict):
+        if key["table"] not in changes:
+            return False
+        touched = changes[key["table"]]
+        year, quarter = key["year"], key["quarter"]
+    else:
+        if any(parts is None for parts in changes.values()):
+            return True
+        touched = [p for parts in changes.values() for p in parts]
+        year, quarter = key[2], query_layer.quarter_number(key[3])
+    if touched is None:
+        return True
+    return any((year in ("All", None) or int(year) == y) and (quarter in ("All", None) or int(quarter) == q)
+               for y, q in touched)
+
+
+class ResultCache:
+    """SQLite store of pickled aggregate frames, evicting least-recently-used rows past ``max_bytes``.
+
+    Safe to share between threads and processes: each thread has its own connection and the
+    database runs in WAL mode. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, version, query):
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM results WHERE version = ? AND query = ?",
+                           (version, query)).fetchone()
+        self._count(row is not None)
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET last_used = ? WHERE version = ? AND query = ?",
+                     (time.time(), version, query))
+        conn.commit()
+        return pickle.loads(row[0])
+
+    def put(self, version, query, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO results (version, query, value, size, last_used) "
+                     "VALUES (?, ?, ?, ?, ?)", (version, query, blob, len(blob), time.time()))
+        self._evict(conn)
+        conn.commit()
+
+    def get_or_compute(self, version, query, compute):
+        value = self.get(version, query)
+        if value is None:
+            value = compute()
+            self.put(version, query, value)
+        return value
+
+    def carry_over(self, old_version, new_version, changes):
+        """Copy ``old_version``'s entries that read no changed partition to ``new_version``.
+
+        Run when an incremental ingest lands, so only the affected aggregates and figures are
+        recomputed under the new version. Returns the number of entries carried over.
+        """
+        conn = self._conn()
+        queries = [q for (q,) in conn.execute("SELECT query FROM results WHERE version = ?", (old_version,))
+                   if not reads_partitions(q, changes)]
+        conn.executemany("INSERT OR IGNORE INTO results (version, query, value, size, last_used) "
+                         "SELECT ?, query, value, size, last_used FROM results WHERE version = ? AND query = ?",
+                         [(new_version, old_version, q) for q in queries])
+        self._evict(conn)
+        conn.commit()
+        return len(queries)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        doomed = []
+        for version, query, size in conn.execute(
+                "SELECT version, query, size FROM results ORDER BY last_used"):
+            doomed.append((version, query))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM results WHERE version = ? AND query = ?", doomed)
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM results")
+        conn.commit()
+
+    def stats(self):
+        entries, size, versions = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COUNT(DISTINCT version) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries, "bytes": size, "versions": versions, "max_bytes": self.max_bytes}
+
+
+def from_env(data_dir=DEFAULT_OUTPUT):
+    """Cache configured by ``PULSE_RESULT_CACHE`` (a path, or 0/off), or None when disabled."""
+    setting = os.environ.get(CACHE_ENV, "")
+    if setting.lower() in ("0", "off", "false", "no"):
+        return None
+    max_bytes = int(float(os.environ.get(CACHE_SIZE_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+    return ResultCache(setting or os.path.join(data_dir, CACHE_FILE), max_bytes)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the on-disk query result cache.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--clear", action="store_true", help="drop every cached result")
+    args = parser.parse_args(argv)
+
+    cache = from_env(args.output)
+    if cache is None:
+        print(f"Result cache disabled by {CACHE_ENV}")
+        return
+    if args.clear:
+        cache.clear()
+    stats = cache.stats()
+    print(f"{cache.path}: {stats['entries']} results, {stats['bytes']} bytes across "
+          f"{stats['versions']} data versions (limit {stats['max_bytes']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+
+import backends
+import cube
+import growth
+import rankings
+import result_cache
+import watch
+from ingest import DEFAULT_OUTPUT
+
+log = logging.getLogger(__name__)
+
+# ⏱️ How often the background thread checks for a new data version
+REFRESH_ENV = "PULSE_REFRESH_SECONDS"
+
+
+class Snapshot:
+    """Everything one data version needs to answer queries: backend + cube + top-N rankings,
+    plus the growth matrices, which are built from the backend on first use."""
+
+    def __init__(self, version, backend, agg_cube, ranks=None, file_version=None):
+        self.version = version
+        self.file_version = file_version  # fingerprint of the output directory, to chain watch.py events
+        self.backend = backend
+        self.cube = agg_cube
+        self.rankings = ranks
+        self.growth = growth.Growth(backend)
+        self.built_at = time.time()
+
+
+class SnapshotStore:
+    """Serves the current snapshot; a daemon thread builds the next one when the version changes.
+
+    Readers only ever dereference ``self._current`` (an atomic swap), so sessions keep using the
+    old snapshot while the new one loads and never wait on a reload. Unless disabled with
+    ``PULSE_RESULT_CACHE=0``, backend aggregates also go through the on-disk result cache, so a
+    restarted process serves previously computed queries without recomputing them.
+
+    Events from ``watch.py`` are picked up every ``PULSE_CHANGE_POLL_SECONDS`` (default 1) and
+    applied incrementally: only the changed (year, quarter) partitions are reloaded and only the
+    cached results that read them are dropped. Other version changes rebuild the whole snapshot.
+    """
+
+    def __init__(self, data_dir=DEFAULT_OUTPUT, backend_name=None, poll_interval=None):
+        self.data_dir = data_dir
+        self.backend_name = backend_name
+        self.poll_interval = float(poll_interval or os.environ.get(REFRESH_ENV, 30))
+        self.change_interval = float(os.environ.get(watch.CHANGE_POLL_ENV, 1))
+        self._refresh_lock = threading.Lock()
+        self.result_cache = result_cache.from_env(data_dir)
+        self._feed = watch.ChangeFeed(data_dir)
+        self._current = self._build()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, name="pulse-snapshot-refresh", daemon=True)
+        self._thread.start()
+
+    def current(self):
+        return self._current
+
+    def _build(self, version=None, previous=None, changes=None):
+        """Snapshot of the data on disk; with ``previous`` and ``changes`` (``{table: partitions}``
+        from the change feed) everything outside the changed partitions is carried over.
+
+        With ``previous``, the tables and growth matrices it had loaded are loaded again here,
+        before the swap, so the first request after any reload does not pay for them."""
+        file_version = backends.file_version(self.data_dir)
+        base = getattr(previous.backend, "backend", previous.backend) if previous is not None else None
+        incremental = changes is not None and previous is not None
+        if incremental and isinstance(base, backends.MemoryBackend):
+            backend = base.updated(changes)
+        else:
+            backend = backends.get_backend(self.backend_name, self.data_dir)
+        if isinstance(base, backends.MemoryBackend) and isinstance(backend, backends.MemoryBackend):
+            for table in base.loaded():
+                if backend.available(table):
+                    backend.index(table)
+        version = version or backend.version()
+        if self.result_cache is not None:
+            if incremental and version != previous.version:
+                self.result_cache.carry_over(previous.version, version, changes)
+            backend = backends.CachedBackend(backend, version, self.result_cache)
+        if incremental and previous.rankings is not None and not set(changes) & set(rankings.RANK_TABLES):
+            ranks = previous.rankings
+        else:
+            ranks = rankings.load_rankings(self.data_dir)
+        snapshot = Snapshot(version, backend, cube.load_cube(self.data_dir), ranks, file_version)
+        if previous is not None:
+            snapshot.growth.adopt(previous.growth, changes)
+        return snapshot
+
+    def refresh(self, force=False):
+        """Build and swap in a new snapshot if the data version moved. Returns True on swap."""
+        with self._refresh_lock:
+            old = self._current
+            version = old.backend.version()
+            if version == old.version and not force:
+                return False
+            new = self._build(version, old)
+            self._current = new
+            # The old backend is left to the garbage collector: in-flight reruns may still hold it
+            log.info("pulse data snapshot %s -> %s", old.version, new.version)
+            return True
+
+    def apply_changes(self, events):
+        """Apply change-feed events; falls back to a full rebuild when they do not chain from the
+        current snapshot. Returns True on swap."""
+        with self._refresh_lock:
+            old = self._current
+            target, changes = watch.merge_changes(events, old.file_version)
+            if changes is not None and target != backends.file_version(self.data_dir):
+                changes = None  # something else wrote after the last event
+            version = old.backend.version()
+            if version == old.version and changes is None:
+                return False
+            start = time.perf_counter()
+            new = self._build(version, old, changes)
+            self._current = new
+            log.info("pulse data snapshot %s -> %s (%s) in %.2fs", old.version, new.version,
+                     "full reload" if changes is None else f"{len(changes)} tables changed",
+                     time.perf_counter() - start)
+            return True
+
+    def _poll(self):
+        next_refresh = time.monotonic() + self.poll_interval
+        while not self._stop.wait(min(self.change_interval, self.poll_interval)):
+            try:
+                events = self._feed.poll()
+                if events:
+                    self.apply_changes(events)
+                    next_refresh = time.monotonic() + self.poll_interval
+                elif time.monotonic() >= next_refresh:
+                    next_refresh = time.monotonic() + self.poll_interval
+                    self.refresh()
+            except Exception:
+                log.exception("pulse snapshot refresh failed; keeping version %s", self._current.version)
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,137 @@
+import os
+import shutil
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - parquet output is optional
+    pa = None
+    ds = None
+
+# 📁 <output>/parquet/<dataset>/year=YYYY/quarter=Q/*.parquet
+PARQUET_SUBDIR = "parquet"
+PARTITION_COLS = ["year", "quarter"]
+# Rows inside each partition file are sorted by these, so row-group statistics let readers skip other states
+SORT_COLS = {
+    "map_transaction": ["state", "district"],
+    "map_user": ["state", "district"],
+    "map_insurance": ["state", "district"],
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar output needs pyarrow: pip install pyarrow")
+
+
+def _string():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def schemas():
+    """Typed Arrow schema per dataset: small ints for time, dictionary-encoded labels."""
+    _require_pyarrow()
+    time = [("year", pa.int16()), ("quarter", pa.int8())]
+    top = [("scope", _string()), ("level", _string()), ("entity", _string())]
+    return {
+        "transaction_categories": pa.schema(time + [("category", _string()), ("count", pa.int64()),
+                                                    ("amount", pa.float64())]),
+        "map_hover_transactions": pa.schema(time + [("district", _string()), ("count", pa.int64()),
+                                                    ("amount", pa.float64())]),
+        "user_device_data": pa.schema(time + [("brand", _string()), ("count", pa.int64()),
+                                              ("percentage", pa.float64())]),
+        "insurance_data": pa.schema([("level", _string()), ("state", _string())] + time +
+                                    [("type", _string()), ("count", pa.int64()), ("amount", pa.float64())]),
+        "map_transaction": pa.schema(time + [("state", _string()), ("district", _string()),
+                                             ("count", pa.int64()), ("amount", pa.float64())]),
+        "map_user": pa.schema(time + [("state", _string()), ("district", _string()),
+                                      ("registered_users", pa.int64()), ("app_opens", pa.int64())]),
+        "map_insurance": pa.schema(time + [("state", _string()), ("district", _string()),
+                                           ("insurance_type", _string()), ("count", pa.int64()),
+                                           ("amount", pa.float64())]),
+        "top_transaction": pa.schema(time + top + [("count", pa.int64()), ("amount", pa.float64())]),
+        "top_user": pa.schema(time + top + [("registered_users", pa.int64())]),
+        "top_insurance": pa.schema(time + top + [("count", pa.int64()), ("amount", pa.float64())]),
+    }
+
+
+def partitioning():
+    return ds.partitioning(pa.schema([("year", pa.int16()), ("quarter", pa.int8())]), flavor="hive")
+
+
+def dataset_dir(base_dir, dataset):
+    return os.path.join(base_dir, PARQUET_SUBDIR, dataset)
+
+
+def _coerce(row, schema):
+    """CSV-shaped row -> typed values (quarters like "Q2" become 2)."""
+    out = {}
+    for field in schema:
+        value = row.get(field.name)
+        if field.name == "quarter":
+            value = int(str(value).upper().lstrip("Q"))
+        elif pa.types.is_integer(field.type):
+            value = None if value in (None, "") else int(float(value))
+        elif pa.types.is_floating(field.type):
+            value = None if value in (None, "") else float(value)
+        out[field.name] = value
+    return out
+
+
+def write_partitions(base_dir, dataset, rows, partitions=None):
+    """Write ``rows`` as hive partitions, replacing only the (year, quarter) folders touched.
+
+    ``partitions`` is an iterable of (year, quarter) ints to replace; None rewrites the dataset.
+    """
+    _require_pyarrow()
+    schema = schemas()[dataset]
+    root = dataset_dir(base_dir, dataset)
+    typed = [_coerce(row, schema) for row in rows]
+
+    if partitions is None:
+        shutil.rmtree(root, ignore_errors=True)
+    else:
+        partitions = {(int(y), int(q)) for y, q in partitions}
+        for year, quarter in partitions:
+            shutil.rmtree(os.path.join(root, f"year={year}", f"quarter={quarter}"), ignore_errors=True)
+        typed = [r for r in typed if (r["year"], r["quarter"]) in partitions]
+
+    os.makedirs(root, exist_ok=True)
+    if dataset in SORT_COLS:
+        typed.sort(key=lambda r: tuple(r[col] or "" for col in SORT_COLS[dataset]))
+    if typed:
+        table = pa.Table.from_pylist(typed, schema=schema)
+        ds.write_dataset(table, root, format="parquet", partitioning=partitioning(),
+                         basename_template="part-{i}.parquet", existing_data_behavior="overwrite_or_ignore")
+    return root
+
+
+def exists(base_dir, dataset):
+    return os.path.isdir(dataset_dir(base_dir, dataset))
+
+
+def list_partitions(base_dir, dataset):
+    """(year, quarter) pairs present on disk, read from folder names only."""
+    root = dataset_dir(base_dir, dataset)
+    found = []
+    for year_dir in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        if not year_dir.startswith("year="):
+            continue
+        for quarter_dir in sorted(os.listdir(os.path.join(root, year_dir))):
+            if quarter_dir.startswith("quarter="):
+                found.append((int(year_dir[5:]), int(quarter_dir[8:])))
+    return found
+
+
+def read_dataset(base_dir, dataset, columns=None, year="All", quarter="All"):
+    """Read one dataset as a DataFrame, projecting ``columns`` and pruning partitions."""
+    _require_pyarrow()
+    dataset_obj = ds.dataset(dataset_dir(base_dir, dataset), format="parquet", partitioning=partitioning())
+    condition = None
+    if year != "All":
+        condition = ds.field("year") == int(year)
+    if quarter != "All":
+        q_cond = ds.field("quarter") == int(str(quarter).upper().lstrip("Q"))
+        condition = q_cond if condition is None else condition & q_cond
+    table = dataset_obj.to_table(columns=columns, filter=condition)
+    return table.to_pandas()
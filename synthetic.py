@@ -0,0 +1,150 @@
+import argparse
+import heapq
+import json
+import os
+import random
+
+import dimensions
+from ingest import DEFAULT_ROOT
+
+# 🧪 Synthetic PhonePe Pulse tree: same folders and JSON shapes as the public repo, any scale
+CATEGORIES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+              "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola",
+          "Lenovo", "Huawei", "Others"]
+FIRST_YEAR = 2018
+TOP_N = 10  # entries per list in top/ files (Pulse publishes top 10 states, districts and pincodes)
+# Pulse folder names differ from the canonical name for a few states
+FOLDER_NAMES = {"NCT of Delhi": "delhi"}
+
+
+def state_folder(name):
+    """Canonical state name -> Pulse folder name ("Andaman and Nicobar Islands" -> "andaman-&-nicobar-islands")."""
+    return FOLDER_NAMES.get(name) or name.lower().replace(" and ", "-&-").replace(" ", "-")
+
+
+class Generator:
+    """Writes ``years`` x 4 quarters of files for ``states`` states, each with ``districts``
+    districts of ``pincodes`` pincodes. Values are seeded, so a given scale is reproducible.
+    """
+
+    def __init__(self, root, years=3, states=36, districts=10, pincodes=5, seed=0):
+        self.root = root
+        self.years = [FIRST_YEAR + i for i in range(years)]
+        self.states = list(dimensions.STATE_CENTROIDS)[:states]
+        self.districts = districts
+        self.pincodes = pincodes
+        self.rnd = random.Random(seed)
+        self.files = 0
+        self.bytes = 0
+
+    # ---------------------- Values ----------------------
+    def _metric(self, scale=1.0):
+        count = int(self.rnd.lognormvariate(12, 1.5) * scale) + 1
+        return {"type": "TOTAL", "count": count, "amount": round(count * self.rnd.uniform(200, 2500), 2)}
+
+    def _district_names(self, state):
+        prefix = state_folder(state).replace("-", " ")
+        return [f"{prefix} {i + 1} district" for i in range(self.districts)]
+
+    def _pincodes(self, state_index):
+        base = 110000 + state_index * 10000
+        return [str(base + d * 100 + p) for d in range(self.districts) for p in range(self.pincodes)]
+
+    # ---------------------- Payloads ----------------------
+    def _transactions(self, scale=1.0):
+        return {"transactionData": [{"name": c, "paymentInstruments": [self._metric(scale)]} for c in CATEGORIES]}
+
+    def _insurance(self, scale=1.0):
+        return {"transactionData": [{"name": "Insurance", "paymentInstruments": [self._metric(scale)]}]}
+
+    def _users(self, scale=1.0):
+        counts = [int(self.rnd.lognormvariate(11, 1) * scale) + 1 for _ in BRANDS]
+        total = sum(counts)
+        return {"aggregated": {"registeredUsers": total, "appOpens": total * self.rnd.randint(5, 40)},
+                "usersByDevice": [{"brand": b, "count": c, "percentage": round(c / total, 6)}
+                                  for b, c in zip(BRANDS, counts)]}
+
+    def _hover(self, names, scale=1.0):
+        return {"hoverDataList": [{"name": n, "metric": [self._metric(scale)]} for n in names]}
+
+    def _user_hover(self, names, scale=1.0):
+        return {"hoverData": {n: {"registeredUsers": int(self.rnd.lognormvariate(10, 1) * scale),
+                                  "appOpens": int(self.rnd.lognormvariate(12, 1) * scale)} for n in names}}
+
+    def _top(self, kind, groups):
+        """``groups`` is ``{"states": names, "districts": names, "pincodes": codes}``; like Pulse, each list
+        keeps only its TOP_N largest entries.
+        """
+        if kind == "user":
+            return {g: heapq.nlargest(TOP_N, ({"name": n, "registeredUsers": int(self.rnd.lognormvariate(10, 1))}
+                                              for n in names), key=lambda e: e["registeredUsers"])
+                    for g, names in groups.items()}
+        return {g: heapq.nlargest(TOP_N, ({"entityName": n, "metric": self._metric()} for n in names),
+                                  key=lambda e: e["metric"]["amount"])
+                for g, names in groups.items()}
+
+    def _write(self, parts, data):
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        body = json.dumps({"success": True, "code": "SUCCESS", "data": data, "responseTimestamp": 0})
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+        self.files += 1
+        self.bytes += len(body)
+
+    # ---------------------- Tree ----------------------
+    def run(self):
+        india = ["country", "india"]
+        hover_states = [state_folder(s).replace("-", " ") for s in self.states]
+        all_districts = [d for s in self.states for d in self._district_names(s)]
+        all_pincodes = [p for i in range(len(self.states)) for p in self._pincodes(i)]
+        for year in self.years:
+            for quarter in range(1, 5):
+                period = [str(year), f"{quarter}.json"]
+                self._write(["aggregated", "transaction"] + india + period, self._transactions(len(self.states)))
+                self._write(["aggregated", "user"] + india + period, self._users(len(self.states)))
+                self._write(["aggregated", "insurance"] + india + period, self._insurance(len(self.states)))
+                for kind in ("transaction", "insurance"):
+                    self._write(["map", kind, "hover"] + india + period, self._hover(hover_states))
+                    self._write(["top", kind] + india + period, self._top(
+                        kind, {"states": hover_states, "districts": all_districts, "pincodes": all_pincodes}))
+                self._write(["map", "user", "hover"] + india + period, self._user_hover(hover_states))
+                self._write(["top", "user"] + india + period, self._top(
+                    "user", {"states": hover_states, "districts": all_districts, "pincodes": all_pincodes}))
+                for index, state in enumerate(self.states):
+                    where = india + ["state", state_folder(state)] + period
+                    districts = self._district_names(state)
+                    groups = {"districts": districts, "pincodes": self._pincodes(index)}
+                    self._write(["aggregated", "transaction"] + where, self._transactions())
+                    self._write(["aggregated", "user"] + where, self._users())
+                    self._write(["aggregated", "insurance"] + where, self._insurance())
+                    for kind in ("transaction", "insurance"):
+                        self._write(["map", kind, "hover"] + where, self._hover(districts))
+                        self._write(["top", kind] + where, self._top(kind, groups))
+                    self._write(["map", "user", "hover"] + where, self._user_hover(districts))
+                    self._write(["top", "user"] + where, self._top("user", groups))
+        return self.files, self.bytes
+
+
+def generate(root=DEFAULT_ROOT, years=3, states=36, districts=10, pincodes=5, seed=0):
+    """Write a synthetic tree under ``root``; returns (files, bytes)."""
+    return Generator(root, years, states, districts, pincodes, seed).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic PhonePe Pulse data tree.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="where to write the tree (pulse/data by default)")
+    parser.add_argument("--years", type=int, default=3, help=f"years starting at {FIRST_YEAR}")
+    parser.add_argument("--states", type=int, default=36, help="states (max %d)" % len(dimensions.STATE_CENTROIDS))
+    parser.add_argument("--districts", type=int, default=10, help="districts per state")
+    parser.add_argument("--pincodes", type=int, default=5, help="pincodes per district")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    files, size = generate(args.root, args.years, args.states, args.districts, args.pincodes, args.seed)
+    print(f"✅ Wrote {files} files ({size / 1e6:.1f} MB) under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import result_cache
+from ingest import DEFAULT_OUTPUT, PROJECT_DIR
+
+# 🔥 Renders the dashboard for every sidebar filter and every option of the map view, district
+# drill-down and Top 10 widgets, so the on-disk result cache holds every aggregate and figure
+# before a replica starts taking traffic
+APP_PATH = os.path.join(PROJECT_DIR, "output", "app.py")
+YEAR_LABEL = "Select Year"
+QUARTER_LABEL = "Select Quarter"
+# Widgets swept for every (year, quarter): (kind, label or key, widgets swept for each of its options).
+# The Top 10 scope list depends on the measure and level, so it is nested under them.
+VIEW_WIDGETS = [
+    ("radio", "Select view:", []),
+    ("selectbox", "drill_state", []),
+    ("selectbox", "rank_by", [("radio", "rank_level", [("selectbox", "rank_scope", [])])]),
+]
+
+
+def _widget(widgets, name):
+    return next((w for w in widgets if name in (w.label, w.key)), None)
+
+
+def _widgets(at, kind):
+    return at.selectbox if kind == "selectbox" else at.radio
+
+
+def _choose(at, kind, name, option):
+    widget = _widget(_widgets(at, kind), name)
+    # Selectbox options come back as strings; select() matches them against the app's own values
+    (widget.select if kind == "selectbox" else widget.set_value)(option)
+
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+
+def _session(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    return _run(AppTest.from_file(APP_PATH, default_timeout=timeout))
+
+
+def filter_combinations(timeout=120):
+    """Every (year, quarter) pair the sidebar offers, read from the app itself."""
+    at = _session(timeout)
+    years = _widget(at.selectbox, YEAR_LABEL).options
+    quarters = _widget(at.selectbox, QUARTER_LABEL).options
+    return [(y, q) for y in years for q in quarters]
+
+
+def sweep(at, kind, name, nested):
+    """Render every option of one widget, sweeping the ``nested`` widgets under each, then select
+    its first option again; returns the render count (0 when the page has no such widget)."""
+    widget = _widget(_widgets(at, kind), name)
+    if widget is None:
+        return 0
+    options = list(widget.options)
+    renders = 0
+    for i, option in enumerate(options):
+        if i:
+            _choose(at, kind, name, option)
+            _run(at)
+            renders += 1
+        for inner in nested:
+            renders += sweep(at, *inner)
+    if len(options) > 1:
+        _choose(at, kind, name, options[0])  # applied with the next change
+    return renders
+
+
+def warm(combinations, timeout=120):
+    """Render each (year, quarter) with every option of the map view, drill-down state and Top 10
+    widgets, in one app session; returns the render count."""
+    at = _session(timeout)
+    renders = 0
+    for year, quarter in combinations:
+        _choose(at, "selectbox", YEAR_LABEL, year)
+        _choose(at, "selectbox", QUARTER_LABEL, quarter)
+        _run(at)
+        renders += 1
+        for kind, name, nested in VIEW_WIDGETS:
+            renders += sweep(at, kind, name, nested)
+    return renders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute every filter/view combination of the dashboard.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory holding the ingested data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parallel app sessions")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per render")
+    args = parser.parse_args(argv)
+
+    cache = result_cache.from_env(args.output)
+    if cache is None:
+        sys.exit(f"❌ {result_cache.CACHE_ENV} disables the result cache; there is nothing to warm")
+    # Workers inherit these: same data directory as the server, every tab rendered on each run
+    os.environ["PULSE_OUTPUT_DIR"] = args.output
+    os.environ["PULSE_LAZY_TABS"] = "0"
+
+    # AppTest replaces __main__ in whichever process runs it, so tasks are sent by module name
+    # (warmup.warm, not __main__.warm) and even discovery runs in a worker
+    import warmup
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers or 1)) as pool:
+        combinations = pool.submit(warmup.filter_combinations, args.timeout).result()
+        workers = max(1, min(args.workers or 1, len(combinations)))
+        chunks = [combinations[i::workers] for i in range(workers)]
+        renders = sum(pool.map(warmup.warm, chunks, [args.timeout] * workers))
+
+    stats = cache.stats()
+    print(f"✅ Warmed {len(combinations)} filter combinations ({renders} renders, {workers} workers) "
+          f"in {time.perf_counter() - start:.1f}s; cache holds {stats['entries']} results, {stats['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
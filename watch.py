@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import time
+
+import backends
+import storage
+from ingest import DATASETS, DEFAULT_OUTPUT, DEFAULT_ROOT, incremental_ingest
+
+# 👀 Watch mode: poll pulse/data, ingest only what changed, and append one event per ingest to
+# CHANGES_FILE. Running dashboards tail that file (see snapshots.SnapshotStore) and swap in the
+# new data, reloading only the touched (year, quarter) partitions and invalidating only the
+# cached aggregates that read them.
+CHANGES_FILE = "changes.jsonl"
+CHANGE_POLL_ENV = "PULSE_CHANGE_POLL_SECONDS"
+
+
+# ---------------------- Change feed ----------------------
+def publish(output_dir, previous, version, tables):
+    """Append ``{"previous", "version", "tables": {table: [[year, quarter], ...] or None}}``.
+
+    Versions are :func:`backends.file_version` fingerprints of ``output_dir`` before and after
+    the ingest. One short line per write, so readers never see a torn event.
+    """
+    event = {"previous": previous, "version": version, "tables": tables, "at": round(time.time(), 3)}
+    with open(os.path.join(output_dir, CHANGES_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, separators=(",", ":")) + "\n")
+    return event
+
+
+class ChangeFeed:
+    """Reads events appended to ``output_dir``'s change file after this object was created."""
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, CHANGES_FILE)
+        self.offset = self._size()
+
+    def _size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def poll(self):
+        """New complete events since the last call (a cheap stat when there are none)."""
+        size = self._size()
+        if size < self.offset:
+            self.offset = 0  # truncated or replaced: read it again from the start
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        self.offset += len(complete)
+        return [json.loads(line) for line in complete.splitlines() if line.strip()]
+
+
+def merge_changes(events, since):
+    """Union of the partitions changed by the chain of events starting at version ``since``.
+
+    Returns ``(version, tables)``; ``tables`` is None when the chain does not start at ``since``
+    (a reader that missed an event, or an ingest that bypassed the watcher) and everything must reload.
+    """
+    tables, version = None, since
+    for event in events:
+        if event["previous"] != version:
+            if tables is not None:
+                return event["version"], None
+            continue
+        tables = {} if tables is None else tables
+        for table, partitions in event["tables"].items():
+            if partitions is None or tables.get(table, []) is None:
+                tables[table] = None
+            else:
+                tables[table] = sorted({tuple(p) for p in tables.get(table, [])} | {tuple(p) for p in partitions})
+        version = event["version"]
+    return version, tables
+
+
+# ---------------------- Watcher ----------------------
+def scan(root):
+    """``{path: (size, mtime_ns)}`` of every JSON file under ``root`` (stats only, no reads)."""
+    found = {}
+    for dir_path, _, file_names in os.walk(root):
+        for name in file_names:
+            if name.endswith(".json"):
+                path = os.path.join(dir_path, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (st.st_size, st.st_mtime_ns)
+    return found
+
+
+def ingest_changes(root, output_dir, workers=None, parquet=False, mysql=False):
+    """Ingest what changed under ``root``, optionally reload those partitions into MySQL, and publish."""
+    previous = backends.file_version(output_dir)
+    summary = incremental_ingest(root, output_dir, workers=workers, parquet=parquet)
+    if mysql and summary:
+        import mysql_loader
+
+        conn = mysql_loader.get_connection()
+        try:
+            for table, info in summary.items():
+                csv_path = os.path.join(output_dir, DATASETS[table][0])
+                if info["partitions"] is None:
+                    mysql_loader.load_executemany(conn, table, csv_path)
+                else:
+                    mysql_loader.load_partitions(conn, table, csv_path, info["partitions"])
+            mysql_loader.stamp_version(conn, output_dir)
+        finally:
+            conn.close()
+    # Published even when nothing parsed: the manifest was rewritten, so the version moved
+    return publish(output_dir, previous, backends.file_version(output_dir),
+                   {table: info["partitions"] for table, info in summary.items()})
+
+
+def watch(root, output_dir, interval=2.0, settle=1.0, workers=None, parquet=False, mysql=False, once=False):
+    """Poll ``root`` every ``interval`` seconds; after a change, wait until the tree is unchanged for
+    ``settle`` seconds (a sync still copying files), then ingest and publish."""
+    seen = None
+    while True:
+        current = scan(root)
+        if current != seen:
+            time.sleep(settle)
+            settled = scan(root)
+            if settled == current:
+                start = time.perf_counter()
+                event = ingest_changes(root, output_dir, workers, parquet, mysql)
+                if event["tables"] or seen is None:
+                    touched = {t: "all" if p is None else len(p) for t, p in event["tables"].items()}
+                    print(f"📦 {event['previous']} -> {event['version']} in {time.perf_counter() - start:.1f}s; "
+                          f"partitions per table: {touched or 'none'}", flush=True)
+                seen = settled
+        if once:
+            return
+        time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest new or changed Pulse files as they land and notify dashboards.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="pulse/data directory to watch")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory for the ingested outputs")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between scans")
+    parser.add_argument("--settle", type=float, default=1.0, help="quiet seconds required before ingesting")
+    parser.add_argument("--workers", type=int, default=None, help="ingest process pool size")
+    parser.add_argument("--parquet", action="store_true",
+                        help="keep the Parquet copy in sync (default: on when it already exists)")
+    parser.add_argument("--mysql", action="store_true", help="also reload the changed partitions into MySQL")
+    parser.add_argument("--once", action="store_true", help="ingest and publish once, then exit")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"data root not found: {args.root}")
+    parquet = args.parquet or (storage.pa is not None and any(storage.exists(args.output, d) for d in DATASETS))
+    print(f"👀 Watching {args.root} -> {args.output} every {args.interval:g}s", flush=True)
+    try:
+        watch(args.root, args.output, args.interval, args.settle, args.workers, parquet, args.mysql, args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()